@@ -47,14 +47,6 @@ def normalise_number(number):
         return integer, fractional, exponent, imagunit
 
 ## Helper Functions
-def register(registry, item):
-    if item in registry:
-        index = registry.index(item)
-    else:
-        index = len(registry)
-        registry.append(item)
-    return index
-
 def unpack(vars, type):
     if not vars:
         raise ValueError('vars cannot be empty')
@@ -66,12 +58,39 @@ def unpack(vars, type):
     else:
         raise types.TypeMismatch(types.tuples, type)
 
+## Dispatch
+HANDLERS = {}  # Maps each type of parse node to the function that analyses it
+FALLBACKS = {}  # Caches the base's function for types without their own, until another is registered
+
+def handler(nodetype):
+    'Decorator registering a function as the analyser for a type of parse node, such as one added by a plugin'
+    def decorator(function):
+        HANDLERS[nodetype] = function
+        FALLBACKS.clear()  # The new function may be nearer to some of them than the cached one
+        return function
+    return decorator
+
+def lookup(nodetype):
+    'The analyser for a type of parse node without one of its own, which is that of its nearest base'
+    try:
+        return FALLBACKS[nodetype]
+    except KeyError:
+        pass
+    for base in nodetype.__mro__[1:]:
+        if base in HANDLERS:
+            function = FALLBACKS[nodetype] = HANDLERS[base]
+            return function
+    raise KeyError(nodetype)
+
 ## Analyser Functions
 def analyse(node, scope, values):
     if node is None:
         return passnode()
-    else:
-        return globals()[node.__class__.__name__.lower()](node, scope, values)
+    try:
+        function = HANDLERS[node.__class__]
+    except KeyError:
+        function = lookup(node.__class__)
+    return function(node, scope, values)
 
 def identifiernode(node, scope, values):
     index, _scope = scope.index(node.name)
@@ -79,19 +98,19 @@ def identifiernode(node, scope, values):
     return IdentifierNode(type, index, _scope)
 
 def stringnode(node, scope, values):
-    index = register(values, normalise_string(node.value))
+    index = values.add(normalise_string(node.value))
     return ValueNode(types.String, index)
 
 def numbernode(node, scope, values):
-    index = register(values, normalise_number(node.value))
+    index = values.add(normalise_number(node.value))
     return ValueNode(types.Number, index)
 
 def booleannode(node, scope, values):
-    index = register(values, node.value == 'true')
+    index = values.add(node.value == 'true')
     return ValueNode(types.Boolean, index)
 
 def nonenode(node, scope, values):
-    index = register(values, None)
+    index = values.add(None)
     return ValueNode(types.None_, index)
 
 def rangenode(node, scope, values):
@@ -461,3 +480,12 @@ def assignmentnode(node, scope, values):
             pass
         else:
             raise InvalidSyntax('augmented assignment requires only a single target')
+
+## Handlers
+# Each type of parse node is analysed by the function named after it
+HANDLERS.update(
+    (nodetype, globals()[nodetype.__name__.lower()])
+    for nodetype in vars(parsetree).values()
+    if isinstance(nodetype, type) and issubclass(nodetype, parsetree.ParseNode)
+    and nodetype.__name__.lower() in globals()
+)
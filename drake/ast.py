@@ -175,7 +175,7 @@ class ContinueNode(ASTNode):
 class IfNode(ASTNode):
     condition: ASTNode
     then: ASTNode
-    default: Optional[ParseNode]
+    default: Optional[ASTNode]
 
 @dataclass
 class CaseNode(ASTNode):
@@ -201,5 +201,5 @@ class WhileNode(ASTNode):
 
 @dataclass
 class AssignmentNode(ASTNode):
-    targets: Union[IdentifierNode, List[IdentiferNode]]
+    targets: Union[IdentifierNode, List[IdentifierNode]]
     expression: ASTNode
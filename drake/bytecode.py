@@ -108,6 +108,43 @@ class Unit(enum.Enum):
     TRUE = 1
     NONE = 2
 
+class ConstantPool:
+    '''The distinct values a program uses, each kept once at a fixed index
+
+    Values are indexed by their type as well as by value, so that values which compare equal across
+    types, such as True and 1, each get their own index.
+    '''
+
+    def __init__(self, values=()):
+        self.values = []
+        self.indices = {}
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __contains__(self, value):
+        return (type(value), value) in self.indices
+
+    def add(self, value):
+        'The index of value in the pool, adding it if it isn\'t already there'
+        key = (type(value), value)
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def index(self, value):
+        return self.indices[type(value), value]
+
 class Bytecode(bytearray):
     def __repr__(self):
         contents = ''.join((fr'\x{hex(byte)[2:]:0>2}' for byte in self))
@@ -0,0 +1,76 @@
+import hashlib, os, time
+from pathlib import Path
+from . import lexer, parser, parsetree, serial, tables
+
+## Constants
+# A change to any of the modules that build or store parse trees could change the tree for the same source
+STAMP = hashlib.sha256(b''.join(
+    Path(module.__file__).read_bytes() for module in (lexer, parser, parsetree, serial, tables)
+)).digest()
+MAX_SIZE = 256 * 2**20  # Bytes
+MAX_AGE = 30 * 24 * 60 * 60  # Seconds
+SUFFIX = '.tree'
+
+## Classes
+class Cache:
+    '''Directory of parse trees, each stored under a hash of the source it was parsed from
+
+    Entries are keyed by the parser version as well, so a changed parser never sees stale trees.
+    Entries unused for longer than max_age seconds are evicted, as are the least recently used
+    ones whenever the directory grows beyond max_size bytes.
+    '''
+
+    def __init__(self, directory, max_size=MAX_SIZE, max_age=MAX_AGE):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, source):
+        'Path of the entry for a source, which may be a str or bytes-like, such as an mmap'
+        if isinstance(source, str):
+            source = source.encode()
+        key = hashlib.sha256(STAMP)
+        key.update(source)
+        return self.directory / (key.hexdigest() + SUFFIX)
+
+    def get(self, source):
+        'The tree stored for a source, or None if there isn\'t one'
+        path = self.path(source)
+        try:
+            with open(path, 'rb') as f:
+                tree = serial.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:  # A corrupt entry is just a miss
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # Age counts from when an entry was last used
+        return tree
+
+    def put(self, source, tree):
+        path = self.path(source)
+        temp = path.with_name(f'{path.name}.{os.getpid()}')
+        with open(temp, 'wb') as f:
+            serial.dump(tree, f)
+        os.replace(temp, path)  # So that readers never see a partly-written entry
+        self.evict()
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for path in self.directory.glob('*' + SUFFIX):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Evicted by someone else
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for _, _size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= _size
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field, InitVar
 from typing import Dict
 from . import ast
-from .bytecode import Op, Unit, Bytecode
+from .bytecode import Op, Unit, Bytecode, ConstantPool
 
 ## Constants
 UNARY_OPS = {
@@ -38,7 +38,7 @@ BINARY_OPS = {
 }
 
 ## Classes
-@dataclass
+@dataclass(unsafe_hash=True)  # Hashable, to be kept in a ConstantPool
 class Decimal:
     value: InitVar[str]
     mantissa: int = field(init=False)
@@ -58,7 +58,7 @@ class ASTCompiler:
         self.bytecode = self.compile()
 
     def compile(self):
-        values = []
+        values = ConstantPool()
         insbytecode = Bytecode.assemble(self.Program(self.ast, values))
         valuebytecode = Bytecode.assemble(self.Values(values))
         return valuebytecode + insbytecode
@@ -103,12 +103,7 @@ class ASTCompiler:
             'IMAG_INTEGER': int,
             'IMAG_DECIMAL': Decimal,
         }.get(type)(node.value.value)
-        try:
-            index = values.index(value)
-        except ValueError:
-            index = len(values)
-            values.append(value)
-        yield Op.LOAD_VALUE, index
+        yield Op.LOAD_VALUE, values.add(value)
         if type in ('IMAG_INTEGER', 'IMAG_DECIMAL'):
             yield Op.MAKE_IMAGINARY,
 
@@ -0,0 +1,165 @@
+'''Engine that recognises programs by running the rules generated from grammar.txt
+
+The rules are ordered choices, as in the parser, but each choice only tries the alternatives whose
+FIRST sets contain the next token, and optional and repeated items are only tried when they could
+match it. Results of rules are memoised by position, and nothing is raised until the engine has
+finished, when the furthest position that any token failed to match at gives the error. Source
+can nest as deeply as memory allows, as in a deep parse.
+
+Once a top-level expression has matched and the program's list has moved past it, nothing before
+it is ever tried again, so results are only kept for the expression being matched.
+'''
+import sys
+from array import array
+from .grammar import TOKEN, RULE, SEQUENCE, CHOICE, OPTIONAL, REPEAT, EOF
+from .lexer import KINDS, KIND_NEWLINE, KIND_IDENTIFIER, KIND_STRING, KIND_ERROR, lex, decode
+from .parser import MARGIN, LineIndex, Segments, Expected, mapped
+from .tables import START, RULES
+
+## Constants
+CHECK = 16  # How many rules deeper to go before checking the stack again, using fewer frames than MARGIN
+TOP = 2  # How many rules deep the program's list of top-level expressions is repeated at
+DESCRIPTIONS = {
+    EOF: 'end of input',
+    KIND_NEWLINE: 'newline',
+    KIND_IDENTIFIER: 'identifier',
+    KIND_STRING: 'string',
+    KIND_ERROR: 'valid token',
+    **{kind: 'number' for kind in range(KIND_STRING+1, KIND_ERROR)},
+    **{kind: repr(text) for text, kind in KINDS.items()},
+}
+
+## Classes
+class Recogniser:
+    '''Checks a source against the grammar, without building a tree
+
+    Only the kinds and offsets of the tokens are kept, in arrays as the lexer gives them.
+    '''
+
+    def __init__(self, source):
+        tokens = lex(source)
+        self.source = source
+        self.kinds = array('h')  # Signed, for EOF
+        self.starts = array('I')
+        self.ends = array('I')
+        for kind, start, end in zip(tokens.kinds, tokens.starts, tokens.ends):
+            if kind == KIND_NEWLINE and self.kinds and self.kinds[-1] == KIND_NEWLINE:
+                continue  # A run of newlines is matched as one
+            self.kinds.append(kind)
+            self.starts.append(start)
+            self.ends.append(end)
+        self.kinds.append(EOF)
+        self.starts.append(len(source))
+        self.ends.append(len(source))
+        self.memo = {}
+        self.depth = 0  # How many rules are being matched, one inside another
+        self.segments = Segments()
+        self.furthest = 0  # The furthest token any match failed at, and the kinds expected there
+        self.expected = set()
+
+    def fail(self, position, kinds):
+        if position > self.furthest:
+            self.furthest = position
+            self.expected = set(kinds)
+        elif position == self.furthest:
+            self.expected.update(kinds)
+
+    def nearlimit(self):
+        try:
+            sys._getframe(sys.getrecursionlimit() - MARGIN)
+        except ValueError:
+            return False
+        return True
+
+    def match(self, expression, position):
+        'The position after expression matches at position, or -1 if it doesn\'t'
+        type = expression[0]
+        if type == TOKEN:
+            if self.kinds[position] == expression[1]:
+                return position + 1
+            self.fail(position, (expression[1],))
+            return -1
+        elif type == RULE:
+            key = (expression[1], position)
+            result = self.memo.get(key)
+            if result is None:
+                self.depth += 1
+                rule = RULES[expression[1]]
+                if self.depth % CHECK == 0 and self.nearlimit():
+                    result = self.segments.call(self.match, rule, position)
+                else:
+                    result = self.match(rule, position)
+                self.depth -= 1
+                self.memo[key] = result
+            return result
+        elif type == SEQUENCE:
+            for item in expression[1]:
+                position = self.match(item, position)
+                if position == -1:
+                    return -1
+            return position
+        elif type == CHOICE:
+            _, items, table, default = expression
+            indices = table.get(self.kinds[position], default)
+            if not indices:
+                self.fail(position, table)
+            for index in indices:
+                result = self.match(items[index], position)
+                if result != -1:
+                    return result
+            return -1
+        elif type == OPTIONAL:
+            _, item, first, nullable = expression
+            if nullable or self.kinds[position] in first:
+                result = self.match(item, position)
+                if result != -1:
+                    return result
+            else:
+                self.fail(position, first)
+            return position
+        else:  # REPEAT
+            _, item, first, nullable, least = expression
+            count = 0
+            while nullable or self.kinds[position] in first:
+                result = self.match(item, position)
+                if result == -1 or result == position:
+                    break
+                position = result
+                count += 1
+                if self.depth == TOP:
+                    self.memo.clear()
+            else:
+                self.fail(position, first)
+            if count < least:
+                return -1
+            return position
+
+    def error(self):
+        'The error for the furthest position the source failed to match at'
+        position = self.furthest
+        expected = sorted({DESCRIPTIONS[kind] for kind in self.expected})
+        if len(expected) > 1:
+            expected = ', '.join(expected[:-1]) + ' or ' + expected[-1]
+        else:
+            expected = ''.join(expected)
+        if self.kinds[position] == EOF:
+            got = ''
+        else:
+            got = decode(self.source[self.starts[position]:self.ends[position]])
+        return Expected(expected, got, LineIndex(self.source).location(self.starts[position]))
+
+    def recognise(self):
+        if self.starts[0] != 0:  # As in the parser, a program can't start with whitespace or a comment
+            raise Expected('expression', location=LineIndex(self.source).location(0))
+        if self.match((RULE, START), 0) == -1:
+            raise self.error()
+
+## Functions
+def recognise(source):
+    'Check that source is a valid program, raising InvalidSyntax for the first place it isn\'t'
+    Recogniser(source).recognise()
+
+def check(path):
+    'Check that the file at path is a valid program, reading it through a memory map'
+    with mapped(path) as source:
+        recognise(source)
@@ -0,0 +1,357 @@
+'''Generator of the parse tables in drake.tables, from grammar.txt
+
+The grammar is read into expressions, macros such as List[item] are expanded into a rule for each
+distinct set of arguments they are used with, and the FIRST set of every rule is worked out. From
+that come two sets of tables: FIRST sets keyed the way Parser.peek gives keys, which the parser
+builds its dispatch tables from, and the rules themselves, compiled for drake.engine to run.
+
+Run as `python -m drake.grammar` to regenerate drake/tables.py after changing the grammar.
+'''
+import re, sys
+from pathlib import Path
+from .lexer import (
+    RESERVED, KINDS, KIND_NEWLINE, KIND_IDENTIFIER, KIND_STRING, KIND_BINARY, KIND_OCTAL,
+    KIND_HEXADECIMAL, KIND_DECIMAL
+)
+
+## Constants
+GRAMMAR = Path(__file__).parent.parent / 'grammar.txt'
+TABLES = Path(__file__).parent / 'tables.py'
+TOKEN_NAMES = {
+    'IDENTIFIER': KIND_IDENTIFIER,
+    'STRING': KIND_STRING,
+    'BINARY': KIND_BINARY,
+    'OCTAL': KIND_OCTAL,
+    'HEXADECIMAL': KIND_HEXADECIMAL,
+    'DECIMAL': KIND_DECIMAL,
+}
+LEXEME = re.compile(r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*")|(?P<name>\w+)|(?P<symbol>->|[|()\[\],?*+]))')
+HEADER = '''\
+# Generated from grammar.txt by `python -m drake.grammar`; do not edit
+'''
+# Types of expression in the compiled rules
+TOKEN = 0  # (TOKEN, kind)
+RULE = 1  # (RULE, index)
+SEQUENCE = 2  # (SEQUENCE, items)
+CHOICE = 3  # (CHOICE, items, {kind: indices of the items to try}, indices to try for any other kind)
+OPTIONAL = 4  # (OPTIONAL, item, FIRST set of the item, whether the item can match nothing)
+REPEAT = 5  # (REPEAT, item, FIRST set of the item, whether the item can match nothing, least repeats)
+EOF = -1  # Kind of the end of the source
+
+## Exceptions
+class GrammarError(Exception):
+    'Raised when the grammar is malformed or refers to something that doesn\'t exist'
+
+## Reading
+def tokenise(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = LEXEME.match(text, position)
+        if match is None:
+            raise GrammarError(f'unexpected {text[position:].split()[0]!r}')
+        tokens.append(match.group(match.lastgroup))
+        position = match.end()
+    return tokens
+
+def definitions(text):
+    'Yield the text of each definition, which runs on over indented lines'
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r'\s*#.*', '', line)  # '#' is never part of a terminal
+        if not line.strip():
+            continue
+        if not line[0].isspace() and lines:
+            yield ' '.join(lines)
+            lines = []
+        lines.append(line)
+    if lines:
+        yield ' '.join(lines)
+
+class Reader:
+    'Reads the expressions of one definition, as nested tuples'
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self, expected=None):
+        token = self.peek()
+        if token is None or expected is not None and token != expected:
+            raise GrammarError(f'expected {expected or "more"}, got {token!r} in {" ".join(self.tokens)}')
+        self.position += 1
+        return token
+
+    def choice(self):
+        items = [self.sequence()]
+        while self.peek() == '|':
+            self.next()
+            items.append(self.sequence())
+        return items[0] if len(items) == 1 else ('choice', items)
+
+    def sequence(self):
+        items = []
+        while self.peek() not in (None, '|', ')', ']', ','):
+            items.append(self.postfix())
+        if not items:
+            raise GrammarError(f'empty sequence in {" ".join(self.tokens)}')
+        return items[0] if len(items) == 1 else ('sequence', items)
+
+    def postfix(self):
+        item = self.primary()
+        while self.peek() in ('?', '*', '+'):
+            item = (self.next(), item)
+        return item
+
+    def primary(self):
+        token = self.next()
+        if token == '(':
+            item = self.choice()
+            self.next(')')
+            return item
+        elif token.startswith('"'):
+            return ('literal', token[1:-1].replace('\\n', '\n'))
+        elif token[0].isalpha() or token[0] == '_':
+            if self.peek() == '[':
+                self.next()
+                args = [self.choice()]
+                while self.peek() == ',':
+                    self.next()
+                    args.append(self.choice())
+                self.next(']')
+                return ('call', token, args)
+            return ('name', token)
+        raise GrammarError(f'unexpected {token!r} in {" ".join(self.tokens)}')
+
+def read(text):
+    'The rules and macros of a grammar, as dicts of name -> expression and name -> (params, expression)'
+    rules = {}
+    macros = {}
+    for definition in definitions(text):
+        reader = Reader(tokenise(definition))
+        name = reader.next()
+        if reader.peek() == '[':
+            reader.next()
+            params = [reader.next()]
+            while reader.peek() == ',':
+                reader.next()
+                params.append(reader.next())
+            reader.next(']')
+        else:
+            params = None
+        reader.next('->')
+        expression = reader.choice()
+        if reader.peek() is not None:
+            raise GrammarError(f'unexpected {reader.peek()!r} in {definition}')
+        if name in rules or name in macros:
+            raise GrammarError(f'{name} is defined twice')
+        if params is None:
+            rules[name] = expression
+        else:
+            macros[name] = (params, expression)
+    return rules, macros
+
+## Expansion
+def render(expression):
+    'The expression as grammar text, for naming the rules macros expand to'
+    kind = expression[0]
+    if kind == 'literal':
+        return '"' + expression[1].replace('\n', '\\n') + '"'
+    elif kind in ('name', 'rule'):
+        return expression[1]
+    elif kind == 'call':
+        return f'{expression[1]}[{", ".join(map(render, expression[2]))}]'
+    elif kind == 'sequence':
+        return ' '.join(f'({render(item)})' if item[0] == 'choice' else render(item) for item in expression[1])
+    elif kind == 'choice':
+        return ' | '.join(map(render, expression[1]))
+    elif kind == 'token':
+        return expression[1]
+    else:
+        item = render(expression[1])
+        if expression[1][0] in ('sequence', 'choice'):
+            item = f'({item})'
+        return item + kind
+
+def expand(rules, macros):
+    'Replace names with references to rules or tokens, and macro calls with references to the rules they expand to'
+    expanded = {}
+
+    def resolve(expression, env):
+        kind = expression[0]
+        if kind == 'name':
+            name = expression[1]
+            if name in env:
+                return env[name]
+            elif name in rules:
+                return ('rule', name)
+            elif name in TOKEN_NAMES:
+                return ('token', name)
+            raise GrammarError(f'{name} is not defined')
+        elif kind == 'literal':
+            text = expression[1]
+            if text not in ('\n', 'EOF') and text not in KINDS:
+                raise GrammarError(f'{text!r} is not a keyword or operator')
+            return expression
+        elif kind == 'call':
+            name = expression[1]
+            if name not in macros:
+                raise GrammarError(f'{name} is not a macro')
+            params, body = macros[name]
+            args = [resolve(arg, env) for arg in expression[2]]
+            if len(args) != len(params):
+                raise GrammarError(f'{name} takes {len(params)} arguments')
+            instance = render(('call', name, args))
+            if instance not in expanded:
+                expanded[instance] = None  # So that recursive uses refer to this instance
+                expanded[instance] = resolve(body, dict(zip(params, args)))
+            return ('rule', instance)
+        elif kind in ('sequence', 'choice'):
+            return (kind, [resolve(item, env) for item in expression[1]])
+        else:
+            return (kind, resolve(expression[1], env))
+
+    for name, expression in rules.items():
+        expanded[name] = resolve(expression, {})
+    return expanded
+
+## Analysis
+def kinds(expression):
+    'The token kinds a terminal matches'
+    if expression[0] == 'token':
+        return {TOKEN_NAMES[expression[1]]}
+    text = expression[1]
+    if text == '\n':
+        return {KIND_NEWLINE}
+    elif text == 'EOF':
+        return {EOF}
+    return {KINDS[text]}
+
+def analyse(rules):
+    'Work out which rules can match nothing, and the FIRST set of token kinds of every rule'
+    nullable = {name: False for name in rules}
+    first = {name: set() for name in rules}
+
+    def visit(expression):
+        'Whether the expression can match nothing, and its FIRST set, given what is known so far'
+        kind = expression[0]
+        if kind in ('token', 'literal'):
+            return False, kinds(expression)
+        elif kind == 'rule':
+            return nullable[expression[1]], first[expression[1]]
+        elif kind == 'sequence':
+            result = set()
+            for item in expression[1]:
+                _nullable, _first = visit(item)
+                result |= _first
+                if not _nullable:
+                    return False, result
+            return True, result
+        elif kind == 'choice':
+            results = [visit(item) for item in expression[1]]
+            return any(result[0] for result in results), set().union(*(result[1] for result in results))
+        else:
+            _nullable, _first = visit(expression[1])
+            return _nullable or kind in ('?', '*'), _first
+
+    changed = True
+    while changed:
+        changed = False
+        for name, expression in rules.items():
+            _nullable, _first = visit(expression)
+            if _nullable != nullable[name] or _first != first[name]:
+                nullable[name], first[name] = _nullable, set(_first)
+                changed = True
+    return nullable, first, visit
+
+def keys(kinds):
+    'The keys Parser.peek gives for tokens of the given kinds'
+    names = {kind: text for text, kind in KINDS.items()}
+    result = set()
+    for kind in kinds:
+        if kind == KIND_NEWLINE:
+            result |= {'\n', '\r'}
+        elif kind == EOF:
+            result.add('')
+        elif kind == KIND_IDENTIFIER:
+            result.add('IDENTIFIER')
+        elif kind == KIND_STRING:
+            result.add('STRING')
+        elif kind in (KIND_BINARY, KIND_OCTAL, KIND_HEXADECIMAL, KIND_DECIMAL):
+            result.add('NUMBER')
+        elif names[kind] in RESERVED:
+            result.add(names[kind])
+        else:
+            result.add(names[kind][0])
+    return result
+
+## Compilation
+def tabulate(rules):
+    'The rules as tables for drake.engine: their names, and their expressions as nested tuples'
+    nullable, first, visit = analyse(rules)
+    names = list(rules)
+    indices = {name: index for index, name in enumerate(names)}
+
+    def build(expression):
+        kind = expression[0]
+        if kind in ('token', 'literal'):
+            (token,) = kinds(expression)
+            return (TOKEN, token)
+        elif kind == 'rule':
+            name = expression[1]
+            while rules[name][0] == 'rule':  # Rules that are just another rule are skipped over
+                name = rules[name][1]
+            return (RULE, indices[name])
+        elif kind == 'sequence':
+            return (SEQUENCE, tuple(build(item) for item in expression[1]))
+        elif kind == 'choice':
+            items = expression[1]
+            results = [visit(item) for item in items]
+            table = {}
+            for token in sorted(set().union(*(result[1] for result in results))):
+                table[token] = tuple(index for index, (_nullable, _first) in enumerate(results)
+                                     if _nullable or token in _first)
+            default = tuple(index for index, (_nullable, _) in enumerate(results) if _nullable)
+            return (CHOICE, tuple(build(item) for item in items), table, default)
+        else:
+            _nullable, _first = visit(expression[1])
+            least, most = {'?': (0, 1), '*': (0, None), '+': (1, None)}[kind]
+            item = (build(expression[1]), frozenset(_first), _nullable)
+            if least == 0 and most == 1:
+                return (OPTIONAL, *item)
+            return (REPEAT, *item, least)
+
+    return names, [build(rules[name]) for name in names], {name: keys(first[name]) for name in rules}
+
+def generate(text):
+    'The source of the tables module for a grammar'
+    rules, macros = read(text)
+    names, compiled, first = tabulate(expand(rules, macros))
+    lines = [HEADER]
+    lines.append('# What each rule of the grammar can start with, as the keys Parser.peek gives')
+    lines.append('FIRST = {')
+    for name in rules:
+        lines.append(f'    {name!r}: {{{", ".join(map(repr, sorted(first[name])))}}},')
+    lines.append('}')
+    lines.append('')
+    lines.append('# Every rule, including those that macros expand to, and its expression, for drake.engine')
+    lines.append(f'START = {names.index("program")}')
+    lines.append('NAMES = [')
+    lines.extend(f'    {name!r},' for name in names)
+    lines.append(']')
+    lines.append('RULES = [')
+    lines.extend(f'    {rule!r},' for rule in compiled)
+    lines.append(']')
+    return '\n'.join(lines) + '\n'
+
+## Main
+if __name__ == '__main__':
+    grammar = Path(sys.argv[1]) if len(sys.argv) > 1 else GRAMMAR
+    output = Path(sys.argv[2]) if len(sys.argv) > 2 else TABLES
+    output.write_text(generate(grammar.read_text()))
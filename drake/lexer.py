@@ -0,0 +1,195 @@
+import bisect, functools, re
+from array import array
+
+## Tokens
+WHITESPACE = re.compile(r'[^\S\r\n]*')
+COMMENT = re.compile('(?m://.*$)?')
+NEWLINE = re.compile(r'\r\n?|\n')
+EOF = re.compile(r'$(?![\r\n])')
+IDENTIFIER = re.compile(r'[a-zA-Z_]\w*[!?]?')
+_STRING = r'(?:[^\\\n]|\\.)*?'
+STRING = re.compile(fr'\'{_STRING}\'|\"{_STRING}\"')
+BINARY = re.compile(r'0b(?:_?[01])+')
+OCTAL = re.compile(r'0o(?:_?[0-7])+')
+HEXADECIMAL = re.compile('0x(?:_?[0-9a-fA-F])+')
+DECIMAL = re.compile(r'[0-9](?:_?[0-9])*(?:\.[0-9](?:_?[0-9])*)?(?:[eE][+-]?[0-9](?:_?[0-9])*)?[jJ]?')
+
+RESERVED = [
+    'and',
+    'as',
+    'break',
+    'case',
+    'catch',
+    'const',
+    'continue',
+    'do',
+    'else',
+    'enum',
+    'exception',
+    'false',
+    'finally',
+    'flags',
+    'for',
+    'from',
+    'if',
+    'in',
+    'is',
+    'iter',
+    'module',
+    'mutable',
+    'none',
+    'nonlocal',
+    'not',
+    'object',
+    'or',
+    'pass',
+    'return',
+    'self',
+    'then',
+    'throw',
+    'true',
+    'try',
+    'while',
+    'xor',
+    'yield',
+]
+OPERATORS = [
+    '(', ')', '[', ']', '{', '}', ',', ':', '.', '..', '->',
+    '=', '|=', '^=', '&=', '<<=', '>>=', '+=', '-=', '*=', '/=', '%=', '**=',
+    '<', '<=', '>', '>=', '==', '!=',
+    '|', '^', '&', '<<', '>>', '+', '-', '*', '/', '%', '**', '!',
+]
+
+## Token kinds
+KIND_NEWLINE = 0
+KIND_IDENTIFIER = 1
+KIND_STRING = 2
+KIND_BINARY = 3
+KIND_OCTAL = 4
+KIND_HEXADECIMAL = 5
+KIND_DECIMAL = 6
+KIND_ERROR = 7
+# Every keyword and operator gets a kind of its own
+KINDS = {text: kind for kind, text in enumerate(RESERVED + OPERATORS, start=8)}
+# Kinds of token that each of the patterns above can match
+PATTERN_KINDS = {
+    NEWLINE: {KIND_NEWLINE},
+    IDENTIFIER: {KIND_IDENTIFIER} | {KINDS[word] for word in RESERVED},
+    STRING: {KIND_STRING},
+    BINARY: {KIND_BINARY},
+    OCTAL: {KIND_OCTAL},
+    HEXADECIMAL: {KIND_HEXADECIMAL},
+    DECIMAL: {KIND_DECIMAL},
+}
+
+_GROUPS = {
+    'newline': KIND_NEWLINE,
+    'identifier': KIND_IDENTIFIER,
+    'string': KIND_STRING,
+    'binary': KIND_BINARY,
+    'octal': KIND_OCTAL,
+    'hexadecimal': KIND_HEXADECIMAL,
+    'decimal': KIND_DECIMAL,
+    'error': KIND_ERROR,
+}
+_OPERATOR = '|'.join(re.escape(operator) for operator in sorted(OPERATORS, key=len, reverse=True))
+MASTER = re.compile('|'.join([
+    r'(?P<skip>[^\S\r\n]+|//[^\r\n]*)',
+    fr'(?P<newline>{NEWLINE.pattern})',
+    fr'(?P<identifier>{IDENTIFIER.pattern})',
+    fr'(?P<string>{STRING.pattern})',
+    fr'(?P<binary>{BINARY.pattern})',
+    fr'(?P<octal>{OCTAL.pattern})',
+    fr'(?P<hexadecimal>{HEXADECIMAL.pattern})',
+    fr'(?P<decimal>{DECIMAL.pattern})',
+    fr'(?P<operator>{_OPERATOR})',
+    r'(?P<error>.)',
+]))
+
+## Helper functions
+@functools.lru_cache(maxsize=None)
+def bytes_pattern(pattern):
+    'The equivalent of a str pattern for matching against bytes-like sources, such as an mmap'
+    return re.compile(pattern.pattern.encode(), pattern.flags & ~re.UNICODE)
+
+def isbinary(source):
+    return not isinstance(source, str)
+
+def decode(text):
+    'Decode a slice of a bytes-like source, leaving str slices alone'
+    if isinstance(text, str):
+        return text
+    return text.decode()
+
+# Twins of the above for bytes-like sources
+MASTER_BYTES = bytes_pattern(MASTER)
+BYTES_KINDS = {text.encode(): kind for text, kind in KINDS.items()}
+
+## Classes
+class TokenStream:
+    '''The tokens of a source, as parallel arrays of kind codes and start and end offsets
+
+    The source may be a str, or bytes-like such as an mmap, in which case offsets are in bytes and
+    text is only decoded when asked for.
+    '''
+
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return self.kinds[index], self.text(index)
+
+    def text(self, index):
+        return decode(self.source[self.starts[index]:self.ends[index]])
+
+    def find(self, offset):
+        'Index of the token starting at offset, or -1 if no token starts there'
+        index = bisect.bisect_left(self.starts, offset)
+        if index < len(self.starts) and self.starts[index] == offset:
+            return index
+        return -1
+
+    def next(self, index):
+        'Offset of the token after the one at index, or the end of the source'
+        index += 1
+        if index < len(self.starts):
+            return self.starts[index]
+        return len(self.source)
+
+    def skip(self, offset):
+        'Offset of the first token at or after offset, or None if offset is inside a token'
+        index = bisect.bisect_left(self.starts, offset)
+        if index and self.ends[index-1] > offset:
+            return None
+        if index < len(self.starts):
+            return self.starts[index]
+        return len(self.source)
+
+## Functions
+def lex(source):
+    tokens = TokenStream(source)
+    kinds, starts, ends = tokens.kinds, tokens.starts, tokens.ends
+    if isbinary(source):
+        master, keywords = MASTER_BYTES, BYTES_KINDS
+    else:
+        master, keywords = MASTER, KINDS
+    for match in master.finditer(source):
+        group = match.lastgroup
+        if group == 'skip':
+            continue
+        elif group == 'operator':
+            kind = keywords[match.group()]
+        elif group == 'identifier':
+            kind = keywords.get(match.group(), KIND_IDENTIFIER)
+        else:
+            kind = _GROUPS[group]
+        kinds.append(kind)
+        starts.append(match.start())
+        ends.append(match.end())
+    return tokens
@@ -1,60 +1,20 @@
-import contextlib, re
+import bisect, contextlib, functools, mmap, os, re, sys, threading, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from .parsetree import *
+from .parsetree import children, descendants
+from .tables import FIRST
+from .lexer import (
+    WHITESPACE, COMMENT, NEWLINE, EOF, IDENTIFIER, STRING, BINARY, OCTAL, HEXADECIMAL, DECIMAL,
+    RESERVED, KINDS, PATTERN_KINDS, TokenStream, lex, bytes_pattern, isbinary, decode
+)
 
 ## Tokens
-WHITESPACE = re.compile(r'[^\S\r\n]*')
-COMMENT = re.compile('(?m://.*$)?')
-NEWLINE = re.compile(r'\r\n?|\n')
-EOF = re.compile(r'$(?![\r\n])')
-IDENTIFIER = re.compile(r'[a-zA-Z_]\w*[!?]?')
-_STRING = r'(?:[^\\\n]|\\.)*?'
-STRING = re.compile(fr'\'{_STRING}\'|\"{_STRING}\"')
-BINARY = re.compile(r'0b(?:_?[01])+')
-OCTAL = re.compile(r'0o(?:_?[0-7])+')
-HEXADECIMAL = re.compile('0x(?:_?[0-9a-fA-F])+')
-DECIMAL = re.compile(r'[0-9](?:_?[0-9])*(?:\.[0-9](?:_?[0-9])*)?(?:[eE][+-]?[0-9](?:_?[0-9])*)?[jJ]?')
-
 ASSIGNMENT = '= |= ^= &= <<= >>= += -= *= /= %= **='.split()
-RESERVED = [
-    'and',
-    'as',
-    'break',
-    'case',
-    'catch',
-    'const',
-    'continue',
-    'do',
-    'else',
-    'enum',
-    'exception',
-    'false',
-    'finally',
-    'flags'
-    'for',
-    'from',
-    'if',
-    'in',
-    'is',
-    'iter',
-    'module',
-    'mutable',
-    'none',
-    'nonlocal',
-    'not',
-    'object',
-    'or',
-    'pass',
-    'return',
-    'self',
-    'then',
-    'throw',
-    'true',
-    'try',
-    'while',
-    'xor',
-    'yield',
-]
+# Every parse's symbol table starts with the keywords and operators, so their text is always these objects
+SYMBOLS = {text: text for text in KINDS}
+# Keywords only match whole words, as the lexer makes them, when there is no token stream to look them up in
+WORDS = {word: re.compile(re.escape(word) + r'(?![\w!?])') for word in RESERVED}
 
 ## Exceptions
 class ParserError(Exception):
@@ -74,11 +34,38 @@ class ParserError(Exception):
         return self.message
 
 class ParseFailed(ParserError):
-    'Exception to signify a parse attempt failed and backtracking should occur'
+    '''Exception to signify a parse attempt failed and backtracking should occur
 
-    def __init__(self, pattern, location=()):
+    Only the expected pattern and the cursor are recorded when raised, since almost every failure is
+    caught straight away; the location and message are worked out when first asked for.
+    '''
+
+    def __init__(self, pattern, lines=None, cursor=0):
         self.pattern = pattern
-        super().__init__(f'failure matching {pattern}', location)
+        self.lines = lines
+        self.cursor = cursor
+
+    @property
+    def location(self):
+        if self.lines is None:
+            return ()
+        return self.lines.location(self.cursor)
+
+    @property
+    def linenum(self):
+        return (self.location or (None, None))[0]
+
+    @property
+    def column(self):
+        return (self.location or (None, None))[1]
+
+    @property
+    def message(self):
+        location = self.location
+        if location:
+            return f'failure matching {self.pattern} @ {location[0]}:{location[1]}'
+        else:
+            return f'failure matching {self.pattern}'
 
 class InvalidSyntax(ParserError):
     def __init__(self, error, location=()):
@@ -93,151 +80,578 @@ def Expected(expected, got='', location=()):
 ## Context managers
 OPTIONAL = contextlib.suppress(ParseFailed)
 
+## Operators
+# Binary operators by precedence level, loosest first, and whether each level is right associative
+BINARY_LEVELS = [
+    ('boolor', ['or'], True),
+    ('boolxor', ['xor'], True),
+    ('booland', ['and'], True),
+    ('inclusion', ['in', 'not in'], True),
+    ('identity', ['is', 'is not'], True),
+    ('comparison', ['<', '<=', '>', '>=', '==', '!='], True),
+    ('bitor', ['|'], False),
+    ('bitxor', ['^'], False),
+    ('bitand', ['&'], False),
+    ('shift', ['<<', '>>'], False),
+    ('addition', ['+', '-'], False),
+    ('product', ['*', '/'], False),
+    ('modulus', ['%'], False),
+    ('exponent', ['**'], True),
+]
+LEVELS = {name: level for level, (name, _, _) in enumerate(BINARY_LEVELS)}
+BINARY_OPERATORS = {
+    operator: (level, right)
+    for level, (_, operators, right) in enumerate(BINARY_LEVELS)
+    for operator in operators
+}
+_SYMBOLS = sorted((operator for operator in BINARY_OPERATORS if not operator[0].isalpha()), key=len, reverse=True)
+_WORDS = {operator.split()[0] for operator in BINARY_OPERATORS if operator[0].isalpha()}
+BINARY_OPERATOR = re.compile('|'.join(map(re.escape, _SYMBOLS)) + fr'|(?:{"|".join(sorted(_WORDS))})(?![\w!?])')
+
+## Top-level scanning
+# Brackets change the nesting depth; strings and comments are matched only so that any brackets or
+# commas inside them are ignored
+SCAN = re.compile(fr'[()\[\]{{}},]|{STRING.pattern}|//.*')
+DEPTH = {'(': 1, '[': 1, '{': 1, ')': -1, ']': -1, '}': -1}
+BLANK = re.compile(r'\s*(?://.*)?\s*$')
+
+## Deep parsing
+# Frames to leave free below the recursion limit, for whatever a parse does between nesting levels
+MARGIN = 100
+SEGMENT_STACK = 64 * 2**20  # Bytes
+
 ## Helper functions
 def List(*args):
     return list(args)
 
+def dispatch(*rules):
+    '''Build a table mapping each key to the rules, in order, whose FIRST sets contain it
+
+    FIRST sets are generated from grammar.txt, by the name of the rule without any trailing underscore.
+    '''
+    table = {}
+    for rule in rules:
+        for key in FIRST[rule.__name__.rstrip('_')]:
+            table.setdefault(key, []).append(rule)
+    return {key: tuple(rules) for key, rules in table.items()}
+
+def rule(method):
+    '''Decorator for node matching methods, looking up and storing results in the parser\'s memo table,
+    and recording each attempt in the parser\'s profile
+    '''
+    @functools.wraps(method)
+    def wrapper(parser, *args):
+        state = parser.state
+        if state.memo is None and state.profile is None:
+            return method(parser, *args)
+        if state.profile is not None:
+            return state.profile.apply(method, parser, args)
+        return memoised(method, parser, args)
+    return wrapper
+
+def memoised(method, parser, args):
+    memo = parser.state.memo
+    if memo is None:
+        return method(parser, *args)
+    key = (method, parser.cursor) + args
+    try:
+        result = memo.table[key]
+    except KeyError:
+        memo.misses += 1
+    else:
+        memo.hits += 1
+        if isinstance(result[1], int):  # A failure, as (pattern, cursor)
+            raise ParseFailed(result[0], parser.lines, result[1])
+        cursor, parsed = result
+        return parser._with(cursor=cursor).addparsed(*parsed)
+    try:
+        _parser = method(parser, *args)
+    except ParseFailed as e:
+        # Not the exception itself, whose traceback keeps every frame it passed through alive
+        memo.table[key] = (e.pattern, e.cursor)
+        raise
+    memo.table[key] = (_parser.cursor, tuple(parser.state.stack[parser.height:_parser.height]))
+    return _parser
+
+def nested(method):
+    '''Decorator for the node matching methods that nested source recurses through
+
+    In a deep parse, once the stack nears the recursion limit, the method carries on in another
+    thread with a fresh stack, so that how deeply source can nest is only bounded by memory.
+    '''
+    @functools.wraps(method)
+    def wrapper(parser, *args):
+        segments = parser.state.segments
+        if segments is None:
+            return method(parser, *args)
+        try:
+            sys._getframe(sys.getrecursionlimit() - MARGIN)
+        except ValueError:  # Still room on this stack
+            pass
+        else:
+            return segments.call(method, parser, *args)
+        return method(parser, *args)
+    return wrapper
+
 ## Classes
+class Segments:
+    '''The stacks of a deep parse, each but the first belonging to a worker thread of its own
+
+    Only one stack is ever in use at a time, since each waits for the next to return, so the workers
+    are kept for as long as the parse is, rather than started for every nesting level that needs one.
+    '''
+
+    def __init__(self):
+        self.executors = []
+        self.level = 0
+
+    def call(self, method, *args):
+        level = self.level
+        if level == len(self.executors):
+            size = threading.stack_size(SEGMENT_STACK)
+            try:
+                executor = ThreadPoolExecutor(1)
+                executor.submit(int).result()  # Start its thread while the stack size is set
+            finally:
+                threading.stack_size(size)
+            self.executors.append(executor)
+        def call():
+            self.level = level + 1
+            try:
+                return method(*args)
+            finally:
+                self.level = level
+        return self.executors[level].submit(call).result()
+
+@dataclass
+class RuleStats:
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    hits: int = 0  # Attempts answered from the memo table
+    rescanned: int = 0  # Bytes (or characters, for str sources) scanned again after backtracking
+    time: float = 0.0  # Seconds, including the time spent in the rules this one applies
+
+class Profile:
+    '''Statistics of every attempt to apply each rule in a parse, for finding what makes it slow
+
+    An attempt rescans whatever part of the source it covers that an earlier attempt already reached,
+    so rescanning shows where backtracking throws work away.
+    '''
+
+    def __init__(self):
+        self.rules = {}
+        self.scanned = 0  # The furthest offset any attempt has reached
+
+    def apply(self, method, parser, args):
+        stats = self.rules.get(method.__name__)
+        if stats is None:
+            stats = self.rules[method.__name__] = RuleStats()
+        stats.attempts += 1
+        memo = parser.state.memo
+        hits, misses = (memo.hits, memo.misses) if memo is not None else (0, 0)
+        cursor = stop = parser.cursor
+        scanned = self.scanned
+        start = time.perf_counter()
+        try:
+            _parser = memoised(method, parser, args)
+            stop = _parser.cursor
+            stats.successes += 1
+            return _parser
+        except ParseFailed as e:
+            stop = e.cursor
+            stats.failures += 1
+            raise
+        finally:
+            stats.time += time.perf_counter() - start
+            if memo is not None and (memo.hits, memo.misses) == (hits+1, misses):
+                stats.hits += 1
+            else:
+                if scanned > cursor:
+                    stats.rescanned += max(min(scanned, stop) - cursor, 0)
+                self.scanned = max(self.scanned, stop)
+
+    def report(self, file=None):
+        'Print a table of the statistics for each rule, slowest first'
+        print(f'{"rule":<12}{"attempts":>10}{"successes":>10}{"failures":>10}{"hits":>10}{"rescanned":>10}{"time":>10}',
+              file=file)
+        for name, stats in sorted(self.rules.items(), key=lambda item: item[1].time, reverse=True):
+            print(f'{name:<12}{stats.attempts:>10}{stats.successes:>10}{stats.failures:>10}{stats.hits:>10}'
+                  f'{stats.rescanned:>10}{stats.time:>10.3f}', file=file)
+
 @dataclass
+class Memo:
+    '''Packrat memo table, mapping (rule, cursor) to the result of applying that rule at that position
+
+    A success is kept as (cursor, parsed) and a failure as (pattern, cursor).
+    '''
+    table: dict = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+class LineIndex:
+    '''Index of the offsets at which each line of a source starts, for looking up locations
+
+    A source that is a fragment of a larger file gives the location it starts at in that file.
+    '''
+
+    def __init__(self, source, linenum=1, column=1):
+        self.source = source
+        self.linenum = linenum
+        self.column = column
+        self._starts = None
+
+    def update(self, source):
+        'Replace the source with an edited version, for everything sharing this index to see'
+        self.source = source
+        self._starts = None
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            newlines = bytes_pattern(NEWLINE) if isbinary(self.source) else NEWLINE
+            self._starts = [0] + [newline.end() for newline in newlines.finditer(self.source)]
+        return self._starts
+
+    def location(self, offset):
+        starts = self.starts
+        linenum = bisect.bisect_right(starts, offset)
+        column = (offset-starts[linenum-1])+1
+        if linenum == 1:
+            column += self.column-1
+        return linenum+self.linenum-1, column
+
+class ParseState:
+    '''State shared by every parser derived from the same one: the source, output stack, memo table,
+    line index, symbol table and profile
+    '''
+
+    def __init__(self, source, parsed=(), memo=None, lines=None, spans=None, deep=False, symbols=None,
+                 profile=None):
+        if isinstance(source, TokenStream):
+            self.tokens = source
+            source = source.source
+        else:
+            self.tokens = None
+        self.source = source
+        self.binary = isbinary(source)
+        self.stack = list(parsed)
+        self.memo = memo
+        if lines is None:
+            lines = LineIndex(source)
+        self.lines = lines
+        self.spans = spans
+        self.segments = Segments() if deep else None
+        if symbols is None:
+            symbols = dict(SYMBOLS)
+        self.symbols = symbols
+        self.profile = profile
+
+    def intern(self, text):
+        'The one copy of text kept for the parse, so that equal names and literals are the same object'
+        return self.symbols.setdefault(text, text)
+
 class Parser:
-    source: str
-    cursor: int = 0
-    parsed: tuple = ()
+    '''A position in a parse: a cursor into the source and a height into the shared output stack
+
+    Deriving a new parser only pushes onto the stack above its own height, so an earlier parser is
+    unaffected by anything its descendants do, and backtracking is just going back to using it. The
+    stack is truncated lazily when a parser pushes below entries left over from an abandoned attempt.
+    '''
+    __slots__ = ('state', 'cursor', 'height')
+
+    def __init__(parser, source, cursor=0, parsed=(), memo=None, lines=None, spans=None, deep=False, symbols=None,
+                 profile=None):
+        parser.state = ParseState(source, parsed, memo, lines, spans, deep, symbols, profile)
+        parser.cursor = cursor
+        parser.height = len(parsed)
+
+    def __repr__(parser):
+        return f'Parser(source={parser.source!r}, cursor={parser.cursor!r}, parsed={parser.parsed!r})'
+
+    def __eq__(parser, other):
+        if not isinstance(other, Parser):
+            return NotImplemented
+        return (parser.source, parser.cursor, parser.parsed) == (other.source, other.cursor, other.parsed)
+
+    @property
+    def source(parser):
+        return parser.state.source
+
+    @property
+    def memo(parser):
+        return parser.state.memo
+
+    @property
+    def profile(parser):
+        return parser.state.profile
+
+    @property
+    def lines(parser):
+        return parser.state.lines
+
+    @property
+    def parsed(parser):
+        return tuple(parser.state.stack[:parser.height])
 
     @property
     def location(parser):
-        linenum = 1
-        end = 0
-        for newline in NEWLINE.finditer(parser.source, 0, parser.cursor):
-            linenum += 1
-            end = newline.end()
-        return linenum, (parser.cursor-end)+1
+        return parser.lines.location(parser.cursor)
 
     def __getitem__(parser, item):
-        return parser.parsed[item]
+        if isinstance(item, slice):
+            return parser.parsed[item]
+        if item < 0:
+            item += parser.height
+        if not 0 <= item < parser.height:
+            raise IndexError('parsed index out of range')
+        return parser.state.stack[item]
 
     #
+    def _at(parser, cursor, height):
+        _parser = Parser.__new__(Parser)
+        _parser.state = parser.state
+        _parser.cursor = cursor
+        _parser.height = height
+        return _parser
+
     def _with(parser, cursor=None, parsed=None):
         if cursor is None:
             cursor = parser.cursor
         if parsed is None:
-            parsed = parser.parsed
-        return Parser(parser.source, cursor, parsed)
+            return parser._at(cursor, parser.height)
+        state = parser.state
+        return Parser(parser.source, cursor, parsed, state.memo, state.lines, state.spans, state.segments is not None,
+                      state.symbols, state.profile)
 
     def addparsed(parser, *parsed):
-        return parser._with(parsed=parser.parsed+parsed)
-
-    def withnode(parser, nodeclass, args=0, location=()):
-        if args > 0:
-            parsed, node = parser[:-args], nodeclass(*parser[-args:])
+        stack = parser.state.stack
+        del stack[parser.height:]
+        stack.extend(parsed)
+        return parser._at(parser.cursor, parser.height+len(parsed))
+
+    def withnode(parser, nodeclass, args=0, start=None):
+        stack = parser.state.stack
+        height = parser.height - args
+        node = nodeclass(*stack[height:parser.height])
+        if start is not None:
+            node.offset = start
+            node.lines = parser.state.lines
+        del stack[height:]
+        stack.append(node)
+        return parser._at(parser.cursor, height+1)
+
+    def fail(parser, pattern):
+        return ParseFailed(pattern, parser.lines, parser.cursor)
+
+    def peek(parser):
+        'The key that dispatch tables use for whatever starts at the cursor'
+        cursor = parser.cursor
+        char = parser.source[cursor:cursor+1]
+        if parser.state.binary:
+            char = char.decode('latin-1')
+        if char.isalpha() or char == '_':
+            tokens = parser.state.tokens
+            index = -1 if tokens is None else tokens.find(cursor)
+            if index != -1:
+                word = tokens.text(index)
+            else:
+                _parser = parser.raw_attempt(IDENTIFIER, parse=True)
+                if _parser is None:  # A letter that identifiers can't contain
+                    return char
+                word = _parser[-1]
+            return word if word in KINDS else 'IDENTIFIER'
+        elif char.isdigit():
+            return 'NUMBER'
+        elif char in ('"', "'"):
+            return 'STRING'
         else:
-            parsed, node = parser[:], nodeclass()
-        if location:
-            node.location = location
-        return parser._with(parsed=parsed+(node,))
+            return char
+
+    def alternatives(parser, table, text):
+        exception = None
+        for item in table.get(parser.peek(), ()):
+            try:
+                return item(parser)
+            except ParseFailed as e:
+                exception = e
+        if exception is None:
+            exception = parser.fail(text)
+        raise exception
 
     # Basic matching methods
-    def raw_match(parser, pattern, text, parse=False):
+    def raw_attempt(parser, pattern, parse=False):
+        tokens = parser.state.tokens
+        if tokens is not None and pattern in PATTERN_KINDS:
+            index = tokens.find(parser.cursor)
+            if index != -1:  # Otherwise, not at a token boundary, so fall back to the source
+                if tokens.kinds[index] not in PATTERN_KINDS[pattern]:
+                    return None
+                parser = parser._at(tokens.ends[index], parser.height)
+                if parse:
+                    return parser.addparsed(parser.state.intern(tokens.text(index)))
+                else:
+                    return parser
+        if parser.state.binary:
+            pattern = bytes_pattern(pattern)
         match = pattern.match(parser.source, parser.cursor)
         if match is None:
-            raise ParseFailed(text, parser.location)
-        parser = parser._with(cursor=match.end())
+            return None
+        parser = parser._at(match.end(), parser.height)
         if parse:
-            return parser.addparsed(match.group())
+            return parser.addparsed(parser.state.intern(decode(match.group())))
         else:
             return parser
 
+    def raw_match(parser, pattern, text, parse=False):
+        _parser = parser.raw_attempt(pattern, parse)
+        if _parser is None:
+            raise parser.fail(text)
+        return _parser
+
     def skip(parser):
+        if parser.state.tokens is not None:
+            cursor = parser.state.tokens.skip(parser.cursor)
+            if cursor is not None:
+                return parser._at(cursor, parser.height)
         return parser.raw_match(WHITESPACE, 'whitespace').raw_match(COMMENT, 'comment')
 
-    def match(parser, pattern, text='', parse=False):
+    def attempt(parser, pattern, parse=False):
         if isinstance(pattern, str):
-            text = text or repr(pattern)
-            pattern = re.compile(re.escape(pattern))
-        return parser.raw_match(pattern, text, parse).skip()
+            tokens = parser.state.tokens
+            if tokens is not None and pattern in KINDS:
+                index = tokens.find(parser.cursor)
+                if index != -1:
+                    if tokens.kinds[index] != KINDS[pattern]:
+                        return None
+                    parser = parser._at(tokens.next(index), parser.height)
+                    if parse:
+                        return parser.addparsed(pattern)
+                    else:
+                        return parser
+            pattern = WORDS.get(pattern) or re.compile(re.escape(pattern))
+        parser = parser.raw_attempt(pattern, parse)
+        if parser is None:
+            return None
+        return parser.skip()
+
+    def match(parser, pattern, text='', parse=False):
+        _parser = parser.attempt(pattern, parse)
+        if _parser is None:
+            if isinstance(pattern, str):
+                text = text or repr(pattern)
+            raise parser.fail(text)
+        return _parser
 
     def newline(parser, required=False):
-        num = 0
-        try:
-            while True:
-                parser = parser.raw_match(NEWLINE, 'newline').skip()
-                num += 1
-        except ParseFailed:
-            if required and num == 0:
-                raise
+        _parser = parser.raw_attempt(NEWLINE)
+        if _parser is None:
+            if required:
+                raise parser.fail('newline')
+            return parser
+        while _parser is not None:
+            parser = _parser.skip()
+            _parser = parser.raw_attempt(NEWLINE)
         return parser
 
     def comma(parser):
         return parser.match(',').newline()
 
     def choices(parser, *tokens, parse=False):
-        exception = ValueError('items cannot be empty')
-        for token in tokens:
+        _parser = parser.attempt_choices(*tokens, parse=parse)
+        if _parser is None:
+            token = tokens[-1]
             if isinstance(token, tuple):
                 token, text = token
             else:
                 text = ''
-            try:
-                return parser.match(token, text, parse=parse)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+            raise parser.fail(text or repr(token))
+        return _parser
 
-    # Generic matching methods
-    def _list(parser, item, separator, num=0):
-        parser = item(parser)
-        num += 1
-        with OPTIONAL:
-            while True:
-                parser = item(separator(parser))
-                num += 1
-        return parser.withnode(List, args=num)
-
-    def _nodelist(parser, item, separator):
-        parser = parser.newline()
-        parser = item(parser)
-        parser = separator(parser)
-        parser = parser._list(item, separator, 1)
-        with OPTIONAL:
-            parser = separator(parser)
-        return parser
+    def attempt_choices(parser, *tokens, parse=False):
+        if not tokens:
+            raise ValueError('items cannot be empty')
+        for token in tokens:
+            if isinstance(token, tuple):
+                token = token[0]
+            _parser = parser.attempt(token, parse)
+            if _parser is not None:
+                return _parser
+        return None
 
-    def nodelist(parser, item):
-        try:
+    # Generic matching methods
+    def _item(parser, item):
+        'Match a list item, noting where it starts and stops if the parse is keeping spans'
+        _parser = item(parser)
+        spans = parser.state.spans
+        if spans is not None:
+            node = _parser[-1]
+            spans[id(node)] = (node, parser.cursor, _parser.cursor, item)
+        return _parser
+
+    def _next(parser, items, kind, separator=None):
+        '''Match a separator, if given, and then an item of the given kind or a later one
+
+        Gives the advanced parser and the kind of item matched, or None.
+        '''
+        if separator is not None:
             try:
-                return parser._nodelist(item, lambda p: p.newline(True))
+                parser = separator(parser)
             except ParseFailed:
-                return parser._nodelist(item, Parser.comma)
-        except ParseFailed:
-            try:
-                parser = parser.newline()
-                parser = item(parser)
-                with OPTIONAL:
-                    parser = parser.comma()
-                return parser.newline().withnode(List, args=1)
-            except ParseFailed:
-                return parser.newline().withnode(List)
-
-    def _nodelist2(parser, item1, item2, separator):
+                return None
+        for kind in range(kind, len(items)):
+            with OPTIONAL:
+                return parser._item(items[kind]), kind
+        return None
+
+    def _lists(parser, counts):
+        'Gather the items at the top of the stack into a List of each number of them'
+        stack = parser.state.stack
+        height = start = parser.height - sum(counts)
+        lists = []
+        for count in counts:
+            lists.append(stack[start:start+count])
+            start += count
+        return parser._at(parser.cursor, height).addparsed(*lists)
+
+    def _nodelist(parser, *items):
+        '''Match a list of items of each kind in turn, giving a List of the items of each kind
+
+        The separator, newlines or commas, is whichever of them follows the first item and is itself
+        followed by another item, so that every item is only matched once.
+        '''
+        counts = [0] * len(items)
         parser = parser.newline()
-        parser = parser._list(item1, separator)
-        parser = separator(parser)
-        parser = parser._list(item2, separator)
+        match = parser._next(items, 0)
+        if match is None:
+            return parser._lists(counts)
+        parser, kind = match
+        counts[kind] += 1
+        return parser._separated(items, counts, kind)
+
+    def _separated(parser, items, counts, kind):
+        'Match the rest of a list after its first item, which was of the given kind'
+        for separator in (lambda p: p.newline(True), Parser.comma):
+            match = parser._next(items, kind, separator)
+            if match is not None:
+                break
+        else:
+            with OPTIONAL:
+                parser = parser.comma()
+            return parser.newline()._lists(counts)
+        while match is not None:
+            parser, kind = match
+            counts[kind] += 1
+            match = parser._next(items, kind, separator)
         with OPTIONAL:
             parser = separator(parser)
-        return parser
+        return parser.newline()._lists(counts)
+
+    def nodelist(parser, item):
+        return parser._nodelist(item)
 
     def nodelist2(parser, item1, item2):
-        try:
-            try:
-                return parser._nodelist2(item1, item2, lambda p: p.newline(True))
-            except ParseFailed:
-                return parser._nodelist2(item1, item2, Parser.comma)
-        except ParseFailed:
-            try:
-                return parser.nodelist(item1).withnode(List)
-            except ParseFailed:
-                return parser.withnode(List).nodelist(item2)
+        return parser._nodelist(item1, item2)
 
     def delimitedlist(parser, item, forcelist=False):
         try:
@@ -257,122 +671,127 @@ class Parser:
             except ParseFailed:
                 return item2(parser).withnode(List).withnode(List, args=1)
 
-    def leftrecurse(parser, operand, *operators):
-        location = parser.location
-        parser = operand(parser)
-        with OPTIONAL:
-            while True:
-                parser = operand(parser.choices(*operators, parse=True)) \
-                        .withnode(BinaryOpNode, args=3, location=location)
-        return parser
-
-    def rightrecurse(parser, operand, *operators):
-        location = parser.location
-        parser = operand(parser)
-        with OPTIONAL:
-            parser = parser.choices(*operators, parse=True).rightrecurse(operand, *operators) \
-                           .withnode(BinaryOpNode, args=3, location=location)
+    def binaryop(parser):
+        'Match a binary operator, giving the advanced parser and the operator, or None'
+        tokens = parser.state.tokens
+        index = -1 if tokens is None else tokens.find(parser.cursor)
+        if index != -1:
+            operator = parser.state.intern(tokens.text(index))
+            parser = parser._at(tokens.next(index), parser.height)
+        else:
+            _parser = parser.raw_attempt(BINARY_OPERATOR, parse=True)
+            if _parser is None:
+                return None
+            operator = _parser[-1]
+            parser = parser._at(_parser.cursor, parser.height).skip()
+        if operator == 'not':
+            parser = parser.attempt('in')
+            if parser is None:
+                return None
+            operator = 'not in'
+        elif operator == 'is':
+            _parser = parser.attempt('not')
+            if _parser is not None:
+                parser, operator = _parser, 'is not'
+        elif operator not in BINARY_OPERATORS:
+            return None
+        return parser, operator
+
+    def binary(parser, level=0):
+        'Parse operands joined by binary operators of at least the given level, by precedence climbing'
+        return parser.unary().operations(parser.cursor, level)
+
+    def operations(parser, start, level=0):
+        'Parse binary operators of at least the given level, and their operands, after an operand from start'
+        while True:
+            match = parser.binaryop()
+            if match is None:
+                break
+            _parser, operator = match
+            oplevel, right = BINARY_OPERATORS[operator]
+            if oplevel < level:
+                break
+            try:
+                _parser = _parser.addparsed(operator).binary(oplevel if right else oplevel+1)
+            except ParseFailed:
+                break
+            parser = _parser.withnode(BinaryOpNode, args=3, start=start)
         return parser
 
     # Node matching methods
+    @rule
     def program(parser):
         return parser.nodelist(Parser.expression).raw_match(EOF, 'eof') \
-                     .withnode(BlockNode, args=1, location=parser.location) \
-                     .withnode(ModuleNode, args=1, location=parser.location)
+                     .withnode(BlockNode, args=1, start=parser.cursor) \
+                     .withnode(ModuleNode, args=1, start=parser.cursor)
 
+    @nested
+    @rule
     def expression(parser):
-        items = (
-            Parser.assignment,
-            Parser.keyword,
-            Parser.lambda_,
-            Parser.declaration,
-            Parser.boolor
-        )
-        for item in items:
-            try:
-                return item(parser)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+        return parser.alternatives(EXPRESSION, 'expression')
 
+    @rule
     def assignment(parser):
         return parser.delimitedlist(Parser.target).choices(*ASSIGNMENT, parse=True).expression() \
-                     .withnode(AssignmentNode, args=3, location=parser.location)
+                     .withnode(AssignmentNode, args=3, start=parser.cursor)
 
+    @rule
     def target(parser):
-        location = parser.location
-        try:
-            parser = parser.choices('nonlocal', 'const', parse=True)
-        except ParseFailed:
+        start = parser.cursor
+        _parser = parser.attempt_choices('nonlocal', 'const', parse=True)
+        if _parser is None:
             parser = parser.addparsed('')
+        else:
+            parser = _parser
         try:
             parser = parser.typehint()
         except ParseFailed:
             parser = parser.addparsed(None)
         return parser.identifier() \
-                     .withnode(TargetNode, args=3, location=location)
+                     .withnode(TargetNode, args=3, start=start)
 
+    @rule
     def typehint(parser):
         return parser.match('<').type().match('>')
 
+    @nested
+    @rule
     def type(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.identifier()
         try:
             parser = parser.match('[').nodelist(Parser.type).match(']')
         except ParseFailed:
             parser = parser.addparsed([])
-        return parser.withnode(TypeNode, args=2, location=location)
+        return parser.withnode(TypeNode, args=2, start=start)
 
+    @rule
     def keyword(parser):
-        items = (
-            Parser.if_,
-            Parser.case,
-            Parser.try_,
-            Parser.for_,
-            Parser.while_,
-            Parser.iter,
-            Parser.do,
-            Parser.object_,
-            Parser.enum,
-            Parser.module,
-            Parser.exception,
-            Parser.mutable,
-            Parser.throw,
-            Parser.return_,
-            Parser.yield_,
-            Parser.yieldfrom,
-            Parser.break_,
-            Parser.continue_,
-            Parser.pass_
-        )
-        for item in items:
-            try:
-                return item(parser)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+        return parser.alternatives(KEYWORD, 'keyword')
 
+    @rule
     def if_(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('if').expression().match('then').expression()
         try:
             parser = parser.match('else').expression()
         except ParseFailed:
             parser = parser.addparsed(None)
-        return parser.withnode(IfNode, args=3, location=location)
+        return parser.withnode(IfNode, args=3, start=start)
 
+    @rule
     def case(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('case').primary().match('in').mapping()
         try:
             parser = parser.match('else').expression()
         except ParseFailed:
             parser = parser.addparsed(None)
-        return parser.withnode(CaseNode, args=3, location=location)
+        return parser.withnode(CaseNode, args=3, start=start)
 
+    @rule
     def try_(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('try').expression()
         try:
             parser = parser.addparsed([]).match('finally').expression()
@@ -386,7 +805,7 @@ class Parser:
                     except ParseFailed:
                         parser_ = parser_.addparsed(None)
                     parser = parser_.expression() \
-                                    .withnode(CatchNode, args=3, location=parser.location)
+                                    .withnode(CatchNode, args=3, start=parser.cursor)
                     num += 1
             except ParseFailed as e:
                 if not num:
@@ -396,285 +815,278 @@ class Parser:
                 parser = parser.match('finally').expression()
             except ParseFailed:
                 parser = parser.addparsed(None)
-        return parser.withnode(TryNode, args=3, location=location)
+        return parser.withnode(TryNode, args=3, start=start)
 
+    @rule
     def for_(parser):
         return parser.match('for').delimitedlist(Parser.identifier).match('in').expression().block() \
-                     .withnode(ForNode, args=3, location=parser.location)
+                     .withnode(ForNode, args=3, start=parser.cursor)
 
+    @rule
     def while_(parser):
         return parser.match('while').expression().block() \
-                     .withnode(WhileNode, args=2, location=parser.location)
+                     .withnode(WhileNode, args=2, start=parser.cursor)
 
+    @rule
     def iter(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('iter')
-        items = (
-            Parser.for_,
-            Parser.while_,
-            Parser.list
-        )
-        for item in items:
-            try:
-                return item(parser).withnode(IterNode, args=1, location=location)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+        return parser.alternatives(ITER, 'iter').withnode(IterNode, args=1, start=start)
 
+    @rule
     def do(parser):
         return parser.match('do').block() \
-                     .withnode(DoNode, args=1, location=parser.location)
+                     .withnode(DoNode, args=1, start=parser.cursor)
 
+    @rule
     def object_(parser):
         return parser.match('object').block() \
-                     .withnode(ObjectNode, args=1, location=parser.location)
+                     .withnode(ObjectNode, args=1, start=parser.cursor)
 
+    @rule
     def enum(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('enum')
-        try:
-            parser = parser.match('flags').addparsed(True)
-        except ParseFailed:
+        _parser = parser.attempt('flags')
+        if _parser is None:
             parser = parser.addparsed(False)
+        else:
+            parser = _parser.addparsed(True)
         return parser.match('{').nodelist(Parser.enumitem).match('}') \
-                     .withnode(EnumNode, args=2, location=location)
+                     .withnode(EnumNode, args=2, start=start)
 
+    @rule
     def enumitem(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.identifier()
         try:
             parser = parser.match('=').number()
         except ParseFailed:
             parser = parser.addparsed(None)
-        return parser.withnode(PairNode, args=2, location=location)
+        return parser.withnode(PairNode, args=2, start=start)
 
+    @rule
     def module(parser):
         return parser.match('module').block() \
-                     .withnode(ModuleNode, args=1, location=parser.location)
+                     .withnode(ModuleNode, args=1, start=parser.cursor)
 
+    @rule
     def exception(parser):
         return parser.match('exception').block() \
-                     .withnode(ExceptionNode, args=1, location=parser.location)
+                     .withnode(ExceptionNode, args=1, start=parser.cursor)
 
+    @rule
     def mutable(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.match('mutable')
-        items = (
-            Parser.object_,
-            Parser.mapping,
-            Parser.list,
-            Parser.tuple,
-            Parser.string
-        )
-        for item in items:
-            try:
-                return item(parser).withnode(MutableNode, args=1, location=location)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+        return parser.alternatives(MUTABLE, 'mutable').withnode(MutableNode, args=1, start=start)
 
+    @rule
     def throw(parser):
         return parser.match('throw').expression() \
-                     .withnode(ThrowNode, args=1, location=parser.location)
+                     .withnode(ThrowNode, args=1, start=parser.cursor)
 
+    @rule
     def return_(parser):
         return parser.match('return').expression() \
-                     .withnode(ReturnNode, args=1, location=parser.location)
+                     .withnode(ReturnNode, args=1, start=parser.cursor)
 
+    @rule
     def yield_(parser):
         return parser.match('yield').expression() \
-                     .withnode(YieldNode, args=1, location=parser.location)
+                     .withnode(YieldNode, args=1, start=parser.cursor)
 
+    @rule
     def yieldfrom(parser):
         return parser.match('yield').match('from').expression() \
-                     .withnode(YieldFromNode, args=1, location=parser.location)
+                     .withnode(YieldFromNode, args=1, start=parser.cursor)
 
+    @rule
     def break_(parser):
         return parser.match('break') \
-                     .withnode(BreakNode, location=parser.location)
+                     .withnode(BreakNode, start=parser.cursor)
 
+    @rule
     def continue_(parser):
         return parser.match('continue') \
-                     .withnode(ContinueNode, location=parser.location)
+                     .withnode(ContinueNode, start=parser.cursor)
 
+    @rule
     def pass_(parser):
         return parser.match('pass') \
-                     .withnode(PassNode, location=parser.location)
+                     .withnode(PassNode, start=parser.cursor)
 
+    @rule
     def lambda_(parser):
         return parser.delimitedlist2(Parser.vparam, Parser.kwparam).match('->').expression() \
-                     .withnode(LambdaNode, args=3, location=parser.location)
+                     .withnode(LambdaNode, args=3, start=parser.cursor)
 
+    @rule
     def vparam(parser):
-        location = parser.location
-        try:
-            parser = parser.match('*').addparsed(True)
-        except ParseFailed:
+        start = parser.cursor
+        _parser = parser.attempt('*')
+        if _parser is None:
             parser = parser.addparsed(False)
+        else:
+            parser = _parser.addparsed(True)
         return parser.typehint().identifier() \
-                     .withnode(VParamNode, args=3, location=location)
+                     .withnode(VParamNode, args=3, start=start)
 
+    @rule
     def kwparam(parser):
-        try:
-            return parser.match('**').addparsed(True).typehint().identifier() \
-                         .withnode(KwParamNode, args=3, location=parser.location)
-        except ParseFailed:
+        _parser = parser.attempt('**')
+        if _parser is not None:
+            return _parser.addparsed(True).typehint().identifier() \
+                          .withnode(KwParamNode, args=3, start=parser.cursor)
+        else:
             return parser.addparsed(False).typehint().identifier().match(':').expression() \
-                         .withnode(KwParamNode, args=4, location=parser.location)
+                         .withnode(KwParamNode, args=4, start=parser.cursor)
 
+    @rule
     def declaration(parser, parseconst=True):
-        location = parser.location
-        if parseconst:
-            try:
-                parser = parser.match('const').addparsed(True)
-            except ParseFailed:
-                parser = parser.addparsed(False)
-        else:
+        start = parser.cursor
+        _parser = parser.attempt('const') if parseconst else None
+        if _parser is None:
             parser = parser.addparsed(False)
+        else:
+            parser = _parser.addparsed(True)
         return parser.typehint().identifier() \
-                     .withnode(DeclarationNode, args=3, location=location)
+                     .withnode(DeclarationNode, args=3, start=start)
 
+    @rule
     def boolor(parser):
-        return parser.rightrecurse(Parser.boolxor, 'or')
+        return parser.binary(LEVELS['boolor'])
 
+    @rule
     def boolxor(parser):
-        return parser.rightrecurse(Parser.booland, 'xor')
+        return parser.binary(LEVELS['boolxor'])
 
+    @rule
     def booland(parser):
-        return parser.rightrecurse(Parser.inclusion, 'and')
+        return parser.binary(LEVELS['booland'])
 
-    # Have to special-case these two because of the multi-word operators
+    @rule
     def inclusion(parser):
-        location = parser.location
-        parser = parser.identity()
-        with OPTIONAL:
-            try:
-                _parser = parser.match('not').match('in').addparsed('not in')
-            except ParseFailed:
-                _parser = parser.match('in', parse=True)
-            parser = _parser.inclusion() \
-                            .withnode(BinaryOpNode, args=3, location=location)
-        return parser
+        return parser.binary(LEVELS['inclusion'])
 
+    @rule
     def identity(parser):
-        location = parser.location
-        parser = parser.comparison()
-        with OPTIONAL:
-            try:
-                _parser = parser.match('is').match('not').addparsed('is not')
-            except ParseFailed:
-                _parser = parser.match('is', parse=True)
-            parser = _parser.identity() \
-                            .withnode(BinaryOpNode, args=3, location=location)
-        return parser
+        return parser.binary(LEVELS['identity'])
 
+    @rule
     def comparison(parser):
-        return parser.rightrecurse(Parser.bitor, '<', '<=', '>', '>=', '==', '!=')
+        return parser.binary(LEVELS['comparison'])
 
+    @rule
     def bitor(parser):
-        return parser.leftrecurse(Parser.bitxor, '|')
+        return parser.binary(LEVELS['bitor'])
 
+    @rule
     def bitxor(parser):
-        return parser.leftrecurse(Parser.bitand, '^')
+        return parser.binary(LEVELS['bitxor'])
 
+    @rule
     def bitand(parser):
-        return parser.leftrecurse(Parser.shift, '&')
+        return parser.binary(LEVELS['bitand'])
 
+    @rule
     def shift(parser):
-        return parser.leftrecurse(Parser.addition, '<<', '>>')
+        return parser.binary(LEVELS['shift'])
 
+    @rule
     def addition(parser):
-        return parser.leftrecurse(Parser.product, '+', '-')
+        return parser.binary(LEVELS['addition'])
 
+    @rule
     def product(parser):
-        return parser.leftrecurse(Parser.modulus, '*', '/')
+        return parser.binary(LEVELS['product'])
 
+    @rule
     def modulus(parser):
-        return parser.leftrecurse(Parser.exponent, '%')
+        return parser.binary(LEVELS['modulus'])
 
+    @rule
     def exponent(parser):
-        return parser.rightrecurse(Parser.unary, '**')
+        return parser.binary(LEVELS['exponent'])
 
+    @rule
     def unary(parser):
-        try:
-            return parser.choices('not', '!', '-', parse=True).unary() \
-                         .withnode(UnaryOpNode, args=2, location=parser.location)
-        except ParseFailed:
-            return parser.primary()
-
+        _parser = parser.attempt_choices('not', '!', '-', parse=True)
+        if _parser is not None:
+            with OPTIONAL:
+                return _parser.unary() \
+                              .withnode(UnaryOpNode, args=2, start=parser.cursor)
+        return parser.primary()
+
+    @rule
     def primary(parser):
-        location = parser.location
-        parser = parser.atom()
+        return parser.atom().postfix(parser.cursor)
+
+    def postfix(parser, start):
+        'Parse any lookups, calls and subscripts of an atom from start'
         with OPTIONAL:
             while True:
                 try:
                     parser = parser.match('.').identifier() \
-                                   .withnode(LookupNode, args=2, location=location)
+                                   .withnode(LookupNode, args=2, start=start)
                 except ParseFailed:
                     try:
                         parser = parser.match('(').nodelist2(Parser.varg, Parser.kwarg).match(')') \
-                                       .withnode(CallNode, args=3, location=location)
+                                       .withnode(CallNode, args=3, start=start)
                     except ParseFailed:
-                        try:
-                            _parser = parser.range()
-                        except ParseFailed:
-                            _parser = parser.list()
-                        parser = _parser.withnode(SubscriptNode, args=2, location=location)
+                        parser = parser.list().withnode(SubscriptNode, args=2, start=start)
         return parser
 
+    @rule
     def varg(parser):
-        try:
-            return parser.match('*', parse=True).expression() \
-                         .withnode(UnaryOpNode, args=2, location=parser.location)
-        except ParseFailed:
-            return parser.expression()
-
+        _parser = parser.attempt('*', parse=True)
+        if _parser is not None:
+            with OPTIONAL:
+                return _parser.expression() \
+                              .withnode(UnaryOpNode, args=2, start=parser.cursor)
+        return parser.expression()
+
+    @rule
     def kwarg(parser):
-        try:
-            return parser.match('**', parse=True).expression() \
-                         .withnode(UnaryOpNode, args=2, location=parser.location)
-        except ParseFailed:
-            return parser.identifier().match(':').expression() \
-                         .withnode(KwargNode, args=2, location=parser.location)
-
+        _parser = parser.attempt('**', parse=True)
+        if _parser is not None:
+            with OPTIONAL:
+                return _parser.expression() \
+                              .withnode(UnaryOpNode, args=2, start=parser.cursor)
+        return parser.identifier().match(':').expression() \
+                     .withnode(KwargNode, args=2, start=parser.cursor)
+
+    @nested
+    @rule
     def atom(parser):
-        items = (
-            Parser.mapping,
-            Parser.block,
-            Parser.list,
-            Parser.grouping,
-            Parser.tuple,
-            Parser.literal,
-            Parser.identifier
-        )
-        for item in items:
-            try:
-                return item(parser)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+        return parser.alternatives(ATOM, 'atom')
 
+    @rule
     def mapping(parser):
         return parser.match('{').nodelist(Parser.pair).match('}') \
-                     .withnode(MappingNode, args=1, location=parser.location)
+                     .withnode(MappingNode, args=1, start=parser.cursor)
 
+    @rule
     def pair(parser):
         return parser.expression().match(':').expression() \
-                     .withnode(PairNode, args=2, location=parser.location)
+                     .withnode(PairNode, args=2, start=parser.cursor)
 
+    @rule
     def block(parser):
         return parser.match('{').nodelist(Parser.expression).match('}') \
-                     .withnode(BlockNode, args=1, location=parser.location)
+                     .withnode(BlockNode, args=1, start=parser.cursor)
 
+    @rule
     def list(parser):
         try:
             return parser.match('[').range().match(']')
         except ParseFailed:
             return parser.match('[').nodelist(Parser.expression).match(']') \
-                         .withnode(ListNode, args=1, location=parser.location)
+                         .withnode(ListNode, args=1, start=parser.cursor)
 
+    @rule
     def range(parser):
-        location = parser.location
+        start = parser.cursor
         parser = parser.primary().match('..')
         try:
             parser = parser.primary()
@@ -684,33 +1096,154 @@ class Parser:
             parser = parser.match(',').primary()
         except ParseFailed:
             parser = parser.addparsed(None)
-        return parser.withnode(RangeNode, args=3, location=location)
+        return parser.withnode(RangeNode, args=3, start=start)
 
+    @rule
     def grouping(parser):
         return parser.match('(').newline().expression().newline().match(')')
 
+    @rule
     def tuple(parser):
         return parser.match('(').nodelist(Parser.expression).match(')') \
-                     .withnode(TupleNode, args=1, location=parser.location)
-
-    def literal(parser):
-        items = (
-            Parser.string,
-            Parser.number,
-            Parser.boolean,
-            Parser.none
-        )
+                     .withnode(TupleNode, args=1, start=parser.cursor)
+
+    # Parenthesised lists
+    def _recast(parser, items, nodes, rule):
+        '''Give the nodes that items of a cover are reinterpreted as the items' locations, and their
+        spans, if the parse is keeping them, with the rule that would match them on their own
+        '''
+        spans = parser.state.spans
+        for item, node in zip(items, nodes):
+            if node is not item:
+                node.offset = item.offset
+                node.lines = item.lines
+            if spans is not None:
+                span = spans.pop(id(item), None)
+                if span is not None:
+                    spans[id(node)] = (node, span[1], span[2], rule)
+        return nodes
+
+    def _targets(parser, items, grouped):
+        'The items of a cover as assignment targets, or None if they can\'t all be'
+        if any(grouped):
+            return None
+        targets = []
         for item in items:
-            try:
-                return item(parser)
-            except ParseFailed as e:
-                exception = e
-        raise exception
+            if isinstance(item, TargetNode):
+                targets.append(item)
+            elif isinstance(item, IdentifierNode):
+                targets.append(TargetNode('', None, item))
+            elif isinstance(item, DeclarationNode):
+                targets.append(TargetNode('const' if item.const else '', item.typehint, item.name))
+            else:
+                return None
+        return parser._recast(items, targets, Parser.target)
+
+    def _params(parser, items, grouped):
+        'The items of a cover as the positional and keyword parameters of a lambda, or None if they can\'t all be'
+        if any(grouped):
+            return None
+        vparams = []
+        for index, item in enumerate(items):
+            if isinstance(item, VParamNode):
+                vparams.append(item)
+            elif isinstance(item, DeclarationNode) and not item.const:
+                vparams.append(VParamNode(False, item.typehint, item.name))
+            else:
+                break
+        else:
+            index = len(items)
+        kwparams = items[index:]
+        if not all(isinstance(item, KwParamNode) for item in kwparams):
+            return None
+        return parser._recast(items, vparams, Parser.vparam), parser._recast(kwparams, kwparams, Parser.kwparam)
+
+    def _enclosure(parser, items, grouping, start):
+        'Push the grouping or tuple that a cover is, failing if any of its items isn\'t an expression'
+        if any(isinstance(item, (TargetNode, VParamNode, KwParamNode)) for item in items):
+            raise parser.fail('expression')
+        parser._recast(items, items, Parser.expression)
+        if grouping:
+            return parser.addparsed(items[0])
+        return parser.addparsed(items).withnode(TupleNode, args=1, start=start)
+
+    @rule
+    def coveritem(parser):
+        'Match anything that an item of a parenthesised target, parameter or expression list can be'
+        try:
+            return parser.expression()
+        except ParseFailed:
+            return parser.alternatives(COVERITEM, 'expression')
+
+    @rule
+    def cover(parser):
+        '''Match a parenthesised list of cover items, pushing the List of them, a List of whether each one
+        is itself parenthesised, and whether the list is a grouping, which is a single item without a comma
+
+        An item is only parenthesised if it is a grouping itself, and then it is never a target or parameter.
+        '''
+        grouped = []
+        def coveritem(parser):
+            parenthesised = parser.peek() == '('
+            _parser = parser.coveritem()
+            grouped.append(parenthesised)
+            return _parser
+        items = (coveritem,)
+        parser = parser.match('(').newline()
+        match = parser._next(items, 0)
+        if match is None:
+            return parser.withnode(List).addparsed([], False).match(')')
+        parser = match[0]
+        _parser = parser.newline().attempt(')')
+        if _parser is not None:
+            return _parser.withnode(List, args=1).addparsed(grouped, True)
+        return parser._separated(items, [1], 0).addparsed(grouped, False).match(')')
+
+    @rule
+    def parenthesised(parser):
+        '''Match an expression starting with a parenthesised list: an assignment to several targets, a
+        lambda, or a grouping or tuple with any operations on it
+
+        The list is only matched once, as a cover of all of these, and is reinterpreted by what follows it.
+        '''
+        start = parser.cursor
+        parser = parser.cover()
+        items, grouped, grouping = parser[-3:]
+        parser = parser._at(parser.cursor, parser.height-3)
+        targets = parser._targets(items, grouped)
+        if targets is not None:
+            _parser = parser.attempt_choices(*ASSIGNMENT, parse=True)
+            if _parser is not None:
+                with OPTIONAL:
+                    return parser.addparsed(targets, _parser[-1])._at(_parser.cursor, parser.height+2) \
+                                 .expression().withnode(AssignmentNode, args=3, start=start)
+        params = parser._params(items, grouped)
+        if params is not None:
+            _parser = parser.attempt('->')
+            if _parser is not None:
+                with OPTIONAL:
+                    return parser.addparsed(*params)._at(_parser.cursor, parser.height+2) \
+                                 .expression().withnode(LambdaNode, args=3, start=start)
+        return parser._enclosure(items, grouping, start).postfix(start).operations(start)
+
+    @rule
+    def enclosure(parser):
+        'Match a grouping or tuple, by way of the cover it shares with target and parameter lists'
+        start = parser.cursor
+        parser = parser.cover()
+        items, grouped, grouping = parser[-3:]
+        return parser._at(parser.cursor, parser.height-3)._enclosure(items, grouping, start)
+
+    @rule
+    def literal(parser):
+        return parser.alternatives(LITERAL, 'literal')
 
+    @rule
     def string(parser):
         return parser.match(STRING, 'string', parse=True) \
-                     .withnode(StringNode, args=1, location=parser.location)
+                     .withnode(StringNode, args=1, start=parser.cursor)
 
+    @rule
     def number(parser):
         return parser.choices(
                         (BINARY, 'binary'),
@@ -718,19 +1251,358 @@ class Parser:
                         (HEXADECIMAL, 'hexadecimal'),
                         (DECIMAL, 'decimal'),
                         parse=True
-                    ).withnode(NumberNode, args=1, location=parser.location)
+                    ).withnode(NumberNode, args=1, start=parser.cursor)
 
+    @rule
     def boolean(parser):
         return parser.choices('true', 'false', parse=True) \
-                     .withnode(BooleanNode, args=1, location=parser.location)
+                     .withnode(BooleanNode, args=1, start=parser.cursor)
 
+    @rule
     def none(parser):
         return parser.match('none') \
-                     .withnode(NoneNode, location=parser.location)
+                     .withnode(NoneNode, start=parser.cursor)
 
+    @rule
     def identifier(parser):
-        location = parser.location
-        parser = parser.match(IDENTIFIER, 'identifier', parse=True)
-        if parser[-1] in RESERVED:
-            raise Expected('identifier', got=parser[-1], location=location)
-        return parser.withnode(IdentifierNode, args=1, location=location)
+        _parser = parser.match(IDENTIFIER, 'identifier', parse=True)
+        if _parser[-1] in RESERVED:
+            raise parser.fail('identifier')
+        return _parser.withnode(IdentifierNode, args=1, start=parser.cursor)
+
+## Dispatch tables
+EXPRESSION = dispatch(
+    Parser.assignment,
+    Parser.keyword,
+    Parser.lambda_,
+    Parser.declaration,
+    Parser.boolor
+)
+KEYWORD = dispatch(
+    Parser.if_,
+    Parser.case,
+    Parser.try_,
+    Parser.for_,
+    Parser.while_,
+    Parser.iter,
+    Parser.do,
+    Parser.object_,
+    Parser.enum,
+    Parser.module,
+    Parser.exception,
+    Parser.mutable,
+    Parser.throw,
+    Parser.return_,
+    Parser.yield_,
+    Parser.yieldfrom,
+    Parser.break_,
+    Parser.continue_,
+    Parser.pass_
+)
+ITER = dispatch(
+    Parser.for_,
+    Parser.while_,
+    Parser.list
+)
+MUTABLE = dispatch(
+    Parser.object_,
+    Parser.mapping,
+    Parser.list,
+    Parser.tuple,
+    Parser.string
+)
+ATOM = dispatch(
+    Parser.mapping,
+    Parser.block,
+    Parser.list,
+    Parser.grouping,
+    Parser.tuple,
+    Parser.literal,
+    Parser.identifier
+)
+COVERITEM = dispatch(
+    Parser.target,
+    Parser.vparam,
+    Parser.kwparam
+)
+# Anything starting with '(' is matched by way of a cover of everything it can be, since expression
+# rules starting with a parenthesised list would otherwise each match it over again
+EXPRESSION['('] = (Parser.parenthesised,)
+ATOM['('] = (Parser.enclosure,)
+LITERAL = dispatch(
+    Parser.string,
+    Parser.number,
+    Parser.boolean,
+    Parser.none
+)
+
+## Incremental reparsing
+class Document:
+    '''A program that is kept parsed as edits are made to its source
+
+    Alongside the tree, the start and stop offsets of every list item in it are kept, and an edit
+    only reparses the innermost list item that encloses it, falling back to enclosing items, and
+    finally the whole program, when the reparsed item doesn't stop in the same place as before.
+    Nodes outside the reparsed item are kept as they are, with their offsets shifted to match, and
+    the line index they share is updated in place, and reparses share the symbol table of the full parse.
+    '''
+
+    def __init__(self, source):
+        self.source = source
+        self.parse()
+
+    def parse(self):
+        self.lines = LineIndex(self.source)
+        self.spans = {}
+        self.symbols = dict(SYMBOLS)
+        self.tree = None
+        self.tree = Parser(lex(self.source), memo=Memo(), lines=self.lines, spans=self.spans,
+                           symbols=self.symbols).program()[-1]
+        return self.tree
+
+    def enclosing(self, start, stop):
+        'The list items enclosing the source between start and stop, outermost first, with where each is kept'
+        spans = self.spans
+        chain = []
+        pending = [(self.tree, name) for name in self.tree.__dataclass_fields__]
+        while pending:
+            container, key = pending.pop()
+            if isinstance(container, list):
+                value = container[key]
+            else:
+                value = getattr(container, key)
+            if isinstance(value, list):
+                if value and id(value[0]) in spans:
+                    # Items are in source order, so only the last one starting by start can enclose it
+                    index = bisect.bisect_right(value, start, key=lambda item: spans[id(item)][1]) - 1
+                    if index != -1:
+                        pending.append((value, index))
+                else:
+                    pending.extend((value, index) for index in range(len(value)))
+            elif isinstance(value, ParseNode):
+                span = spans.get(id(value))
+                if span is not None:
+                    if not span[1] <= start <= stop <= span[2]:
+                        continue
+                    chain.append((container, key, value))
+                    pending.clear()  # Nothing outside this item can enclose the edit
+                pending.extend((value, name) for name in value.__dataclass_fields__)
+        return chain
+
+    def edit(self, offset, removed, inserted):
+        '''Replace removed characters at offset with the inserted text, and reparse
+
+        Returns the new tree. If the new source doesn't parse, the error is raised and the tree is
+        None until a later edit makes it parse again.
+        '''
+        source = self.source[:offset] + inserted + self.source[offset+removed:]
+        stop = offset + removed  # Where the edit stops in the old source
+        delta = len(inserted) - removed
+        self.source = source
+        if self.tree is None:
+            return self.parse()
+        lines = self.lines
+        lines.update(source)
+        chain = self.enclosing(offset, stop)
+        tokens = lex(source)  # As for a full parse, so that the edit can join or split words
+        for depth in reversed(range(len(chain))):
+            container, key, node = chain[depth]
+            _, begin, end, item = self.spans[id(node)]
+            spans = {}
+            try:
+                parser = Parser(tokens, begin, memo=Memo(), lines=lines, spans=spans,
+                                symbols=self.symbols)._item(item)
+            except ParseFailed:
+                continue
+            if parser.cursor == end + delta:
+                break
+        else:
+            return self.parse()
+        new = parser[-1]
+        if isinstance(container, list):
+            container[key] = new
+        else:
+            setattr(container, key, new)
+        for _node in descendants(node):
+            self.spans.pop(id(_node), None)
+        del self.spans[id(node)]
+        for _, _, _node in chain[:depth]:
+            _node, _begin, _end, _item = self.spans[id(_node)]
+            self.spans[id(_node)] = (_node, _begin, _end+delta, _item)
+        self.shift(offset, stop, delta, skip=new)
+        self.spans.update(spans)
+        return self.tree
+
+    def shift(self, offset, stop, delta, skip):
+        'Move the offsets and spans of everything after the edit to match the new source'
+        spans = self.spans
+        pending = [self.tree]
+        while pending:
+            for _, _, node in children(pending.pop()):
+                if node is skip:
+                    continue
+                span = spans.get(id(node))
+                if span is not None:
+                    _node, begin, end, item = span
+                    if end < offset:  # Wholly before the edit
+                        continue
+                    if begin > stop:
+                        spans[id(node)] = (node, begin+delta, end+delta, item)
+                if node.lines is not None and node.offset > stop:
+                    node.offset += delta
+                pending.append(node)
+
+## Functions
+def toplevel(lines, linenum=1):
+    '''Split lines of source at the newlines and commas that aren't inside any brackets
+
+    Yields (linenum, column, text, separator) for each piece, where separator is the ',' or newline
+    that ended it, or '' at the end of the source. Pieces are yielded as soon as they are complete.
+    '''
+    depth = 0
+    chunk = []
+    start = (linenum, 1)
+    for line in lines:
+        pos = 0
+        for match in SCAN.finditer(line):
+            token = match.group()
+            if token == ',' and depth == 0:
+                chunk.append(line[pos:match.start()])
+                yield (*start, ''.join(chunk), ',')
+                chunk = []
+                pos = match.end()
+                start = (linenum, pos+1)
+            else:
+                depth = max(depth + DEPTH.get(token, 0), 0)
+        if depth == 0:
+            text = line[pos:]
+            newline = NEWLINE.search(text)
+            if newline is not None:
+                chunk.append(text[:newline.start()])
+                yield (*start, ''.join(chunk), newline.group())
+                chunk = []
+                start = (linenum+1, 1)
+            else:
+                chunk.append(text)
+        else:
+            chunk.append(line[pos:])
+        linenum += 1
+    if chunk:
+        yield (*start, ''.join(chunk), '')
+
+def parse(source, deep=False, profile=None):
+    '''Parse a whole program from its source, giving its ModuleNode
+
+    Rules are memoised, since an alternative that fails can leave a nested list or call to be parsed
+    again by the next one, and without the memo that repeats at every level of nesting.
+    '''
+    return Parser(lex(source), memo=Memo(), deep=deep, profile=profile).program()[-1]
+
+@contextlib.contextmanager
+def mapped(path):
+    '''Memory-map the file at path read-only, for parsing without reading it all into a str
+
+    Offsets, and so columns, into a mapped source count bytes rather than characters.
+    '''
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # Empty files can't be mapped
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            try:
+                yield source
+            except ParseFailed as e:
+                # The location of a failure is only worked out when asked for, which would be
+                # too late once the map is closed
+                if e.lines is not None:
+                    e.lines.starts
+                raise
+
+def pieces(file):
+    '''Split a program from a file object or path into its top-level expressions, without parsing them
+
+    Yields (linenum, column, text) for each expression, checking that the separators between them
+    follow the same rules as Parser.program.
+    '''
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, newline='') as f:
+            yield from pieces(f)
+        return
+    separator = None  # Whether the program is newline- or comma-separated, once known
+    items = 0
+    commas = 0
+    newlines = 0  # Newlines since the last item, which a comma can't come after
+    first = True
+    for linenum, column, text, ended in toplevel(file):
+        lines = LineIndex(text, linenum, column)
+        if first and text and (text[0].isspace() or text.startswith('//')):
+            # A program can only start with an expression or a newline
+            raise Expected('expression', location=lines.location(0))
+        first = False
+        if BLANK.match(text) is None:
+            if items:
+                _separator = ',' if commas else '\n'
+                if separator is None:
+                    separator = _separator
+                elif separator != _separator:
+                    raise Expected(repr(separator), location=lines.location(0))
+            yield linenum, column, text
+            items += 1
+            commas = 0
+            newlines = 0
+        if ended == ',':
+            if not items or commas or newlines:
+                raise Expected('expression', location=lines.location(len(text)))
+            commas += 1
+        elif ended:
+            newlines += 1
+    if separator == '\n' and commas:
+        raise Expected('newline', location=lines.location(len(text)))
+
+def piece(linenum, column, text, symbols=None):
+    '''Parse one top-level expression, that starts at the given location in its file
+
+    Gives the location of the expression itself, past any leading whitespace, and its node. Pieces
+    of the same file can share a symbol table.
+    '''
+    parser = Parser(lex(text), memo=Memo(), lines=LineIndex(text, linenum, column), symbols=symbols).skip()
+    location = parser.location
+    parser = parser.expression().raw_match(EOF, 'eof')
+    return location, parser[-1]
+
+def _pieces(batch):
+    symbols = dict(SYMBOLS)
+    return [piece(*args, symbols)[1] for args in batch]
+
+def stream(file):
+    '''Parse a program from a file object or path, one top-level expression at a time
+
+    Yields (location, node) for each top-level expression as soon as it has been read and parsed,
+    so that only one expression needs to be held in memory at once. The separators between them
+    follow the same rules as Parser.program.
+    '''
+    symbols = dict(SYMBOLS)
+    for args in pieces(file):
+        yield piece(*args, symbols)
+
+def parallel(file, workers=None):
+    '''Parse a program from a file object or path, with its top-level expressions shared between processes
+
+    The expressions are found by a quick scan for the commas and newlines between them, and are then
+    parsed in batches by a pool of worker processes, each knowing where its expressions start in the
+    file. Gives the same ModuleNode as Parser.program.
+    '''
+    args = list(pieces(file))
+    workers = workers or os.cpu_count() or 1
+    size = -(-len(args) // (workers*4)) or 1  # A few batches per worker evens out the load
+    batches = [args[i:i+size] for i in range(0, len(args), size)]
+    with ProcessPoolExecutor(workers) as executor:
+        expressions = [node for nodes in executor.map(_pieces, batches) for node in nodes]
+    # Each expression shares a line index with the others from its piece; the module and block
+    # only need one that puts offset 0 at the start of the file
+    lines = LineIndex('')
+    block = BlockNode(expressions)
+    block.lines = lines
+    module = ModuleNode(block)
+    module.lines = lines
+    return module
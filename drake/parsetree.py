@@ -1,3 +1,4 @@
+import io
 from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Union
 
@@ -49,386 +50,458 @@ __all__ = [
 ]
 
 ## Helper functions
-def indent(string):
-    return '\n'.join('  '+line for line in string.splitlines())
-
 def isprimary(*nodes):
     return all(isinstance(node, (LiteralNode, NoneNode, IdentifierNode)) for node in nodes)
 
-def pprint(name, *args):
-    argstrings = []
-    for arg in args:
-        if isinstance(arg, ParseNode):
-            argstrings.append(str(arg))
-        elif isinstance(arg, list):
-            argstrings.append(pprint('', *arg).strip())
-        elif arg:
-            argstrings.append(arg)
-    if isprimary(*args):
-        return f'{name} ( {", ".join(argstrings)} )'
-    else:
-        delimiter = ',\n'  # Can't use this directly in the f-string
-        return f'{name} (\n{delimiter.join((indent(arg) for arg in argstrings))}\n)'
+def layout(value):
+    'The name and arguments to lay out a node or list with, or None if it goes on one line'
+    if isinstance(value, list):
+        return '', *value
+    return value.layout()
+
+def write(node, file):
+    '''Write a node to a file, in the same form as str() gives
+
+    Arguments that don't fit on one line are written on lines of their own, indented one level
+    further than their parent. Lines are written as they are reached, so the whole text is never
+    held in memory, and each line is only written once rather than reindented at every level.
+    '''
+    started = False
+    pending = [(0, node)]
+    while pending:
+        depth, value = pending.pop()
+        if value is COMMA:
+            file.write(',')
+            continue
+        _layout = None if isinstance(value, str) else layout(value)
+        if _layout is None:
+            text = value if isinstance(value, str) else value.render()
+        else:
+            name, *args = _layout
+            if isprimary(*args):
+                text = f'{name} ( {", ".join(map(str, args))} )'
+            else:
+                text = f'{name} ('
+                args = [arg for arg in args if isinstance(arg, (ParseNode, list)) or arg]
+                pending.append((depth, ')'))
+                if not args:
+                    pending.append((depth, ''))
+                for i, arg in enumerate(reversed(args)):
+                    if i:
+                        pending.append((depth+1, COMMA))
+                    pending.append((depth+1, arg))
+            if not name:  # Lists are laid out without a name
+                text = text.lstrip()
+        if depth:
+            lines = text.splitlines() or ['']
+        else:
+            lines = [text]
+        for line in lines:
+            if started:
+                file.write('\n')
+            file.write('  '*depth + line)
+            started = True
+
+def children(node):
+    'Yield (container, key, child) for each node directly below node, looking inside lists'
+    pending = [(node, name) for name in node.__dataclass_fields__]
+    while pending:
+        container, key = pending.pop()
+        if isinstance(container, list):
+            value = container[key]
+        else:
+            value = getattr(container, key)
+        if isinstance(value, ParseNode):
+            yield container, key, value
+        elif isinstance(value, list):
+            pending.extend((value, index) for index in range(len(value)))
+
+def descendants(node):
+    'Yield every node below node, each after its parent'
+    pending = [node]
+    while pending:
+        for _, _, child in children(pending.pop()):
+            yield child
+            pending.append(child)
+
+## Constants
+COMMA = object()  # Marks where write() puts the commas between arguments
 
 ## Classes
-@dataclass
-class ParseNode:
-    location: Tuple[int, int] = field(init=False, compare=False)
 
-    def __post_init__(self):
-        self.location = (0,0)  # Set this here so it doesn't fuck with signatures
+@dataclass(slots=True)
+class ParseNode:
+    # Where the node starts, as an offset into a source whose line index is shared by all its nodes
+    offset: int = field(init=False, default=0, compare=False)
+    lines: 'LineIndex' = field(init=False, default=None, repr=False, compare=False)
 
     def __str__(self):
+        output = io.StringIO()
+        write(self, output)
+        return output.getvalue()
+
+    def layout(self):
+        'The name and arguments to lay the node out with, or None if it goes on one line'
+        return None
+
+    def render(self):
+        'The node on one line, for nodes without a layout'
         return self.nodetype
 
+    @property
+    def location(self):
+        if self.lines is None:
+            return (0, 0)
+        return self.lines.location(self.offset)
+
     @property
     def nodetype(self):
         return self.__class__.__name__[:-4]
 
-@dataclass
+@dataclass(slots=True)
 class IdentifierNode(ParseNode):
     name: str
 
-    def __str__(self):
+    def render(self):
         return f'Identifier {self.name}'
 
-@dataclass
+@dataclass(slots=True)
 class LiteralNode(ParseNode):
     value: str
 
-    def __str__(self):
+    def render(self):
         return f'{self.nodetype} {self.value}'
 
-@dataclass
+@dataclass(slots=True)
 class StringNode(LiteralNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NumberNode(LiteralNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class BooleanNode(LiteralNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NoneNode(LiteralNode):
     value: str = field(init=False, default='none')
 
-    def __str__(self):
+    def render(self):
         return 'None'
 
-@dataclass
+@dataclass(slots=True)
 class SequenceNode(ParseNode):
     items: List[ParseNode]
 
-    def __str__(self):
-        return pprint(self.nodetype, *self.items)
+    def layout(self):
+        return self.nodetype, *self.items
 
-@dataclass
+@dataclass(slots=True)
 class RangeNode(ParseNode):
     start: ParseNode
     end: Optional[ParseNode] = None
     step: Optional[ParseNode] = None
 
-    def __str__(self):
-        return pprint('Range', self.start, self.end, self.step)
+    def layout(self):
+        return 'Range', self.start, self.end, self.step
 
-@dataclass
+@dataclass(slots=True)
 class ListNode(SequenceNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class TupleNode(SequenceNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class PairNode(ParseNode):
     key: ParseNode
     value: ParseNode
 
-    def __str__(self):
-        return pprint('Pair', self.key, self.value)
+    def layout(self):
+        return 'Pair', self.key, self.value
 
-@dataclass
+@dataclass(slots=True)
 class MappingNode(SequenceNode):
     items: List[PairNode]
 
-@dataclass
+@dataclass(slots=True)
 class BlockNode(ParseNode):  # Not inheriting from SequenceNode, though it is a kind of sequence
     expressions: List[ParseNode]
 
-    def __str__(self):
-        return pprint('Block', *self.expressions)
+    def layout(self):
+        return 'Block', *self.expressions
 
-@dataclass
+@dataclass(slots=True)
 class SubscriptNode(ParseNode):
     container: ParseNode
     subscript: Union[RangeNode, ListNode]
 
-    def __str__(self):
-        return pprint('Subscript', self.container, self.subscript)
+    def layout(self):
+        return 'Subscript', self.container, self.subscript
 
-@dataclass
+@dataclass(slots=True)
 class LookupNode(ParseNode):
     obj: ParseNode
     attribute: IdentifierNode
 
-    def __str__(self):
-        return pprint('Lookup', self.obj, self.attribute)
+    def layout(self):
+        return 'Lookup', self.obj, self.attribute
 
-@dataclass
+@dataclass(slots=True)
 class KwargNode(ParseNode):
     name: IdentifierNode
     value: ParseNode
 
-    def __str__(self):
-        return pprint('Kwarg', self.name, self.value)
+    def layout(self):
+        return 'Kwarg', self.name, self.value
 
 VArg = Union[ParseNode, 'UnaryOpNode']  # expr | '*' expr
 KwArg = Union[KwargNode, 'UnaryOpNode']  # name = expr | '**' expr
 
-@dataclass
+@dataclass(slots=True)
 class CallNode(ParseNode):
     function: ParseNode
     vargs: List[VArg]
     kwargs: List[KwArg]
 
-    def __str__(self):
-        return pprint('Call', self.function, self.vargs, self.kwargs)
+    def layout(self):
+        return 'Call', self.function, self.vargs, self.kwargs
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOpNode(ParseNode):
     operator: str
     operand: ParseNode
 
-    def __str__(self):
-        return pprint(f'Unary {self.operator}', self.operand)
+    def layout(self):
+        return f'Unary {self.operator}', self.operand
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpNode(ParseNode):
     left: ParseNode
     operator: str
     right: ParseNode
 
-    def __str__(self):
-        return pprint(f'Binary {self.operator}', self.left, self.right)
+    def layout(self):
+        return f'Binary {self.operator}', self.left, self.right
 
-@dataclass
+@dataclass(slots=True)
 class ParamNode(ParseNode):
     starred: bool
-    typehint: TypeNode
+    typehint: 'TypeNode'
     name: IdentifierNode
 
-    def __str__(self):
+    def render(self):
         star = '*' if self.nodetype == 'VParam' else '**'
         if self.starred:
             return f'{self.nodetype} {star} <{self.typehint}> {self.name}'
         else:
             return f'{self.nodetype} <{self.typehint}> {self.name}'
 
-@dataclass
+@dataclass(slots=True)
 class VParamNode(ParamNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class KwParamNode(ParamNode):
     value: Optional[ParseNode] = None
 
-    def __str__(self):
-        if value is not None:
-            return pprint('KwParam', f'<{self.typehint}> {self.name}', self.value)
+    def layout(self):
+        if self.value is not None:
+            return 'KwParam', f'<{self.typehint}> {self.name}', self.value
         else:
-            return super().__str__()
+            return None
 
-@dataclass
+@dataclass(slots=True)
 class LambdaNode(ParseNode):
     vparams: List[VParamNode]
     kwparams: List[KwParamNode]
     returns: ParseNode
 
-    def __str__(self):
-        return pprint(self.nodetype, self.vparams, self.kwparams, self.returns)
+    def layout(self):
+        return self.nodetype, self.vparams, self.kwparams, self.returns
 
-@dataclass
+@dataclass(slots=True)
 class KeywordNode(ParseNode):
     expression: ParseNode
 
-    def __str__(self):
-        return pprint(self.nodetype, self.expression)
+    def layout(self):
+        return self.nodetype, self.expression
 
-@dataclass
+@dataclass(slots=True)
 class IterNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class DoNode(KeywordNode):
     expression: BlockNode
 
-@dataclass
+@dataclass(slots=True)
 class ObjectNode(ParseNode):
     definition: BlockNode
 
-    def __str__(self):
-        return pprint(self.nodetype, self.definition)
+    def layout(self):
+        return self.nodetype, self.definition
 
-@dataclass
+@dataclass(slots=True)
 class EnumNode(ParseNode):
     flags: bool
     items: List[PairNode]
 
-    def __str__(self):
+    def layout(self):
         if self.flags:
-            return pprint('Enum flags', *self.items)
+            return 'Enum flags', *self.items
         else:
-            return pprint('Enum', *self.items)
+            return 'Enum', *self.items
 
-@dataclass
+@dataclass(slots=True)
 class ModuleNode(ObjectNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ExceptionNode(ObjectNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class MutableNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ThrowNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ReturnNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class YieldNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class YieldFromNode(KeywordNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class BreakNode(ParseNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ContinueNode(ParseNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class PassNode(ParseNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class IfNode(ParseNode):
     condition: ParseNode
     then: ParseNode
     default: Optional[ParseNode]
 
-    def __str__(self):
+    def layout(self):
         if self.default is None:  # No else
-            return pprint('If', self.condition, self.then)
+            return 'If', self.condition, self.then
         else:
-            return pprint('If', self.condition, self.then, self.default)
+            return 'If', self.condition, self.then, self.default
 
-@dataclass
+@dataclass(slots=True)
 class CaseNode(ParseNode):
     value: ParseNode
     cases: MappingNode
     default: Optional[ParseNode]
 
-    def __str__(self):
+    def layout(self):
         if self.default is None:  # No else
-            return pprint('Case', self.var, self.cases)
+            return 'Case', self.value, self.cases
         else:
-            return pprint('Case', self.var, self.cases, self.default)
+            return 'Case', self.value, self.cases, self.default
 
-@dataclass
+@dataclass(slots=True)
 class CatchNode(ParseNode):
     exception: IdentifierNode
     name: Optional[IdentifierNode]
     body: ParseNode  # Might change to BlockNode
 
-    def __str__(self):
-        return pprint('Catch', self.exception, self.container, self.body)
+    def layout(self):
+        return 'Catch', self.exception, self.name, self.body
 
-@dataclass
+@dataclass(slots=True)
 class TryNode(ParseNode):
     body: ParseNode
     catches: List[CatchNode]
     finally_: Optional[ParseNode]
 
-    def __str__(self):
-        return pprint('Try', self.body, *self.catch, self.finally_)
+    def layout(self):
+        return 'Try', self.body, *self.catches, self.finally_
 
-@dataclass
+@dataclass(slots=True)
 class ForNode(ParseNode):
     vars: Union[IdentifierNode, List[IdentifierNode]]
     container: ParseNode
     body: BlockNode
 
-    def __str__(self):
-        return pprint('For', self.vars, self.container, self.body)
+    def layout(self):
+        return 'For', self.vars, self.container, self.body
 
-@dataclass
+@dataclass(slots=True)
 class WhileNode(ParseNode):
     condition: ParseNode
     body: BlockNode
 
-    def __str__(self):
-        return pprint('While', self.condition, self.body)
+    def layout(self):
+        return 'While', self.condition, self.body
 
-@dataclass
+@dataclass(slots=True)
 class TargetNode(ParseNode):
     mode: str
     typehint: Optional['TypeNode']
     name: IdentifierNode
 
-    def __str__(self):
+    def render(self):
         fragments = []
         if self.mode:
-            fragments.append(mode)
+            fragments.append(self.mode)
         if self.typehint:
             fragments.append(f'<{self.typehint}>')
         fragments.append(str(self.name))
         return ' '.join(fragments)
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentNode(ParseNode):
     targets: Union[TargetNode, List[TargetNode]]
     operator: str
     expression: ParseNode
 
-    def __str__(self):
+    def layout(self):
         if self.operator == '=':
             nodetype = 'Assign'
         else:
             nodetype = f'Assign {self.operator}'
-        return pprint(nodetype, self.targets, self.expression)
+        return nodetype, self.targets, self.expression
 
-@dataclass
+@dataclass(slots=True)
 class TypeNode(ParseNode):
     type: IdentifierNode
     params: List['TypeNode'] = field(default_factory=list)
 
-    def __str__(self):
+    def render(self):
         type = self.type.name
         if self.params:
-            return f'{type}[{", ".join(self.params)}]'
+            return f'{type}[{", ".join(map(str, self.params))}]'
         else:
             return type
 
-@dataclass
+@dataclass(slots=True)
 class DeclarationNode(ParseNode):
     const: bool
-    typehint: TypeNode
+    typehint: 'TypeNode'
     name: IdentifierNode
 
-    def __str__(self):
+    def render(self):
         if self.const:
             return f'const <{self.typehint}> {self.name}'
         else:
@@ -34,25 +34,61 @@ class Binding:
             self.assigned = assignment
             self.const = const
 
+_MISSING = object()
+
 @dataclass
 class Scope:
+    '''The bindings of one scope, indexed by name, and the scope enclosing it
+
+    Names found in an enclosing scope are cached with where they were found, until a new binding of
+    the same name anywhere in the tree of scopes might shadow it.
+    '''
+
     def __init__(self, *bindings, parent=_MISSING):
-        self.bindings = list(bindings)
         if parent is _MISSING:
             parent = builtins
         self.parent = parent
+        self.bindings = list(bindings)
+        self.reindex()
+
+    def reindex(self):
+        'Index the bindings by name, as when the scope was made from its bindings and parent'
+        bindings = self.bindings
+        # Shared by every scope in the tree, counting the bindings made of each name. Each tree gets its
+        # own below the builtins, which never gain bindings, so that separate programs don't share one
+        if self.parent is None or self.parent is builtins:
+            self.shadows = {}
+        else:
+            self.shadows = self.parent.shadows
+        self.bindings = []
+        self.names = {}
+        self.resolved = {}  # Maps names found in an enclosing scope to (index, scope, shadows when found)
+        for binding in bindings:
+            self.add(binding)
 
     def __getitem__(self, item):
         binding = self.bindings[item]
         return binding
 
+    def add(self, binding):
+        'Append a new binding, shadowing any of the same name in an enclosing scope'
+        index = len(self.bindings)
+        self.bindings.append(binding)
+        self.names.setdefault(binding.name, index)
+        self.shadows[binding.name] = self.shadows.get(binding.name, 0) + 1
+        return index
+
     def index(self, name, local=None):
         if local != False:
-            for index, binding in enumerate(self.bindings):
-                if binding.name == name:
-                    return index, 0
+            index = self.names.get(name)
+            if index is not None:
+                return index, 0
         if local != True:
             if self.parent:
+                shadows = self.shadows.get(name, 0)
+                resolved = self.resolved.get(name)
+                if resolved is not None and resolved[2] == shadows:
+                    return resolved[:2]
                 try:
                     index, scope = self.parent.index(name)
                 except NameNotFound as e:
@@ -60,6 +96,7 @@ class Scope:
                     raise e
                 if scope != -1:
                     scope += 1
+                self.resolved[name] = (index, scope, shadows)
                 return index, scope
         raise NameNotFound(name, local)
 
@@ -83,15 +120,15 @@ class Scope:
         except NameNotFound:
             if local == False:
                 raise
-            index = len(self.bindings)
-            binding = Binding(name, type, assignment, const)
-            self.bindings.append(binding)
-            return index, 0
+            return self.add(Binding(name, type, assignment, const)), 0
 
     def child(self, *bindings):
-        return Scope(bindings, parent=self)
+        return Scope(*bindings, parent=self)
 
 class _Builtins(Scope):
+    def __init__(self, *bindings):
+        super().__init__(*bindings, parent=None)
+
     def index(self, name):
         index, scope = super().index(name)
         return index, -1
@@ -0,0 +1,281 @@
+'''Compact binary encoding of parse trees and analysed ASTs
+
+An encoded tree is a header, a table of every distinct string in the tree, then the tree itself in
+pre-order. Each value starts with a one-byte tag: nodes have a tag per node type, followed by their
+fields in order, while integers and counts are varints and strings are indices into the table.
+Objects that several nodes can share, such as line indices, scopes and types, are encoded once and
+referred back to after that. Neither writing nor loading recurses, so trees of any depth work.
+'''
+import functools, hashlib
+from dataclasses import fields
+from . import parsetree
+from .parser import LineIndex
+
+## Constants
+MAGIC = b'DRK'
+VERSION = 1
+# Kinds of tree
+PARSETREE = 0
+AST = 1
+# Tags
+NONE = 0
+FALSE = 1
+TRUE = 2
+INT = 3
+STR = 4
+LIST = 5
+TUPLE = 6
+REF = 7  # An object already encoded, by the order objects were first encoded in
+CONSTANT = 8  # A builtin object, such as a builtin type, by its index in the schema
+LINES = 9
+NODE = 16  # Tags from here on are node types
+
+## Exceptions
+class FormatError(Exception):
+    'Raised when data isn\'t an encoded tree, or was encoded with different node classes'
+
+## Classes
+class Schema:
+    '''The node classes of one kind of tree, numbered in the order their modules define them
+
+    Classes in shared can be referred to from more than one place, so are encoded only once.
+    Constants are objects that already exist wherever the tree is loaded, such as builtin types.
+    Objects of the classes in finish are passed to its function once their fields are loaded, to
+    rebuild whatever else they keep.
+    '''
+
+    def __init__(self, classes, shared=(), constants=(), names={}, finish={}):
+        self.classes = list(classes)
+        if len(self.classes) > 256-NODE:
+            raise ValueError('too many node classes to give each a tag')
+        self.codes = {cls: NODE+code for code, cls in enumerate(self.classes)}
+        self.names = {cls: names.get(cls) or tuple(field.name for field in fields(cls)) for cls in self.classes}
+        self.shared = frozenset(shared)
+        self.constants = list(constants)
+        self.finish = dict(finish)
+        # Data encoded with different classes or fields can't be loaded with these ones
+        layout = [(cls.__module__, cls.__qualname__, self.names[cls]) for cls in self.classes]
+        layout.append([getattr(constant, 'name', type(constant).__name__) for constant in self.constants])
+        self.fingerprint = hashlib.sha256(repr(layout).encode()).digest()[:8]
+
+## Helper functions
+def nodes(module, base):
+    return [value for value in vars(module).values() if isinstance(value, type) and issubclass(value, base)]
+
+@functools.cache
+def schema(kind):
+    if kind == PARSETREE:
+        return Schema(nodes(parsetree, parsetree.ParseNode))
+    elif kind == AST:
+        from . import ast, scopes, types  # Only needed by analysed trees
+        return Schema(
+            nodes(ast, ast.ASTNode) + [types.Type, scopes.Binding, scopes.Scope],
+            shared=(types.Type, scopes.Binding, scopes.Scope),
+            constants=(*types.builtin, scopes.builtins),
+            names={scopes.Scope: ('bindings', 'parent')},
+            finish={scopes.Scope: scopes.Scope.reindex},
+        )
+    else:
+        raise FormatError(f'unknown kind of tree: {kind}')
+
+def varint(output, value):
+    while value > 0x7f:
+        output.append(value & 0x7f | 0x80)
+        value >>= 7
+    output.append(value)
+
+def readvarint(data, position):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+## Functions
+def dumps(tree):
+    'Encode a parse tree or analysed AST as bytes'
+    kind = PARSETREE if isinstance(tree, parsetree.ParseNode) else AST
+    _schema = schema(kind)
+    codes, names, shared = _schema.codes, _schema.names, _schema.shared
+    constants = {id(constant): index for index, constant in enumerate(_schema.constants)}
+    strings = {}
+    objects = {}  # id -> (index, object), keeping the object alive so its id isn't reused
+    body = bytearray()
+    pending = [tree]
+    while pending:
+        value = pending.pop()
+        cls = type(value)
+        if value is None:
+            body.append(NONE)
+        elif cls is bool:
+            body.append(TRUE if value else FALSE)
+        elif cls is int:
+            body.append(INT)
+            varint(body, value << 1 if value >= 0 else (~value << 1) | 1)
+        elif cls is str:
+            body.append(STR)
+            varint(body, strings.setdefault(value, len(strings)))
+        elif cls is list or cls is tuple:
+            body.append(LIST if cls is list else TUPLE)
+            varint(body, len(value))
+            pending.extend(reversed(value))
+        elif id(value) in constants:
+            body.append(CONSTANT)
+            varint(body, constants[id(value)])
+        elif id(value) in objects:
+            body.append(REF)
+            varint(body, objects[id(value)][0])
+        elif cls is LineIndex:
+            objects[id(value)] = len(objects), value
+            body.append(LINES)
+            varint(body, value.linenum)
+            varint(body, value.column)
+            starts = value.starts
+            varint(body, len(starts))
+            previous = 0
+            for start in starts:
+                varint(body, start - previous)
+                previous = start
+        elif cls in codes:
+            if cls in shared:
+                objects[id(value)] = len(objects), value
+            body.append(codes[cls])
+            pending.extend(getattr(value, name) for name in reversed(names[cls]))
+        else:
+            raise TypeError(f'cannot encode {cls.__name__} objects')
+    output = bytearray(MAGIC)
+    output.append(VERSION)
+    output.append(kind)
+    output += _schema.fingerprint
+    varint(output, len(strings))
+    for string in strings:
+        string = string.encode('utf-8', 'surrogatepass')
+        varint(output, len(string))
+        output += string
+    output += body
+    return bytes(output)
+
+def dump(tree, file):
+    'Encode a parse tree or analysed AST to a binary file object'
+    file.write(dumps(tree))
+
+def loads(data):
+    'Decode a tree encoded by dumps, from bytes or any bytes-like object, such as an mmap'
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    try:
+        return _loads(data)
+    except IndexError:
+        raise FormatError('data is truncated') from None
+
+def load(file):
+    'Decode a tree encoded by dump, from a binary file object'
+    return loads(file.read())
+
+def _loads(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise FormatError('data is not an encoded tree')
+    position = len(MAGIC)
+    if data[position] != VERSION:
+        raise FormatError(f'unsupported version: {data[position]}')
+    _schema = schema(data[position+1])
+    position += 2
+    if data[position:position+8] != _schema.fingerprint:
+        raise FormatError('data was encoded with different node classes')
+    position += 8
+    classes, names, shared, constants = _schema.classes, _schema.names, _schema.shared, _schema.constants
+    finish = _schema.finish
+    count, position = readvarint(data, position)
+    strings = []
+    for _ in range(count):
+        length, position = readvarint(data, position)
+        strings.append(data[position:position+length].decode('utf-8', 'surrogatepass'))
+        position += length
+    objects = []
+    root = []
+    # Each frame is [object being filled, its field names or None for a list, fields filled,
+    # fields in all, where to put the finished tuple or None]
+    stack = [[root, None, 0, 1, None]]
+    while stack:
+        tag = data[position]
+        position += 1
+        frame = None
+        if tag >= NODE:
+            cls = classes[tag-NODE]
+            value = cls.__new__(cls)
+            if cls in shared:
+                objects.append(value)
+            _names = names[cls]
+            if _names:
+                frame = [value, _names, 0, len(_names), None]
+        elif tag == STR:
+            index, position = readvarint(data, position)
+            value = strings[index]
+        elif tag == INT:
+            value, position = readvarint(data, position)
+            value = value >> 1 if not value & 1 else ~(value >> 1)
+        elif tag == NONE:
+            value = None
+        elif tag == LIST or tag == TUPLE:
+            count, position = readvarint(data, position)
+            if not count:
+                value = [] if tag == LIST else ()
+            else:
+                value = []
+                frame = [value, None, 0, count, None]
+                if tag == TUPLE:
+                    value = None  # Filled in once all the items are
+        elif tag == FALSE or tag == TRUE:
+            value = tag == TRUE
+        elif tag == REF:
+            index, position = readvarint(data, position)
+            value = objects[index]
+        elif tag == CONSTANT:
+            index, position = readvarint(data, position)
+            value = constants[index]
+        elif tag == LINES:
+            linenum, position = readvarint(data, position)
+            column, position = readvarint(data, position)
+            count, position = readvarint(data, position)
+            starts = []
+            start = 0
+            for _ in range(count):
+                delta, position = readvarint(data, position)
+                start += delta
+                starts.append(start)
+            value = LineIndex(None, linenum, column)
+            value._starts = starts
+            objects.append(value)
+        else:
+            raise FormatError(f'unknown tag: {tag}')
+        # Put the value in the object being filled
+        parent = stack[-1]
+        target, _names, filled = parent[0], parent[1], parent[2]
+        if _names is None:
+            target.append(value)
+            key = filled
+        else:
+            key = _names[filled]
+            setattr(target, key, value)
+        parent[2] = filled + 1
+        if frame is not None:
+            if value is None:
+                frame[4] = target, key
+            stack.append(frame)
+        # Finish every object that is now full
+        while stack and stack[-1][2] == stack[-1][3]:
+            target, _names, _, _, destination = stack.pop()
+            if _names is not None and type(target) in finish:
+                finish[type(target)](target)
+            if destination is not None:
+                container, key = destination
+                if isinstance(container, list):
+                    container[key] = tuple(target)
+                else:
+                    setattr(container, key, tuple(target))
+    if position != len(data):
+        raise FormatError('data continues after the tree')
+    return root[0]
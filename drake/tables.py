@@ -0,0 +1,257 @@
+# Generated from grammar.txt by `python -m drake.grammar`; do not edit
+
+# What each rule of the grammar can start with, as the keys Parser.peek gives
+FIRST = {
+    'program': {'', '\n', '\r', '!', '(', '*', '-', '<', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'break', 'case', 'const', 'continue', 'do', 'enum', 'exception', 'false', 'for', 'if', 'iter', 'module', 'mutable', 'none', 'nonlocal', 'not', 'object', 'pass', 'return', 'throw', 'true', 'try', 'while', 'yield', '{'},
+    'expression': {'!', '(', '*', '-', '<', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'break', 'case', 'const', 'continue', 'do', 'enum', 'exception', 'false', 'for', 'if', 'iter', 'module', 'mutable', 'none', 'nonlocal', 'not', 'object', 'pass', 'return', 'throw', 'true', 'try', 'while', 'yield', '{'},
+    'assignment': {'(', '<', 'IDENTIFIER', 'const', 'nonlocal'},
+    'ASSIGN': {'%', '&', '*', '+', '-', '/', '<', '=', '>', '^', '|'},
+    'target': {'<', 'IDENTIFIER', 'const', 'nonlocal'},
+    'typehint': {'<'},
+    'type': {'IDENTIFIER'},
+    'keyword': {'break', 'case', 'continue', 'do', 'enum', 'exception', 'for', 'if', 'iter', 'module', 'mutable', 'object', 'pass', 'return', 'throw', 'try', 'while', 'yield'},
+    'if': {'if'},
+    'case': {'case'},
+    'try': {'try'},
+    'for': {'for'},
+    'while': {'while'},
+    'iter': {'iter'},
+    'do': {'do'},
+    'object': {'object'},
+    'enum': {'enum'},
+    'enumitem': {'IDENTIFIER'},
+    'module': {'module'},
+    'exception': {'exception'},
+    'mutable': {'mutable'},
+    'throw': {'throw'},
+    'return': {'return'},
+    'yieldfrom': {'yield'},
+    'yield': {'yield'},
+    'break': {'break'},
+    'continue': {'continue'},
+    'pass': {'pass'},
+    'lambda': {'(', '*', '<'},
+    'vparam': {'*', '<'},
+    'kwparam': {'*', '<'},
+    'declaration': {'<', 'const'},
+    'boolor': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'boolxor': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'booland': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'inclusion': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'identity': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'comparison': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'comp': {'!', '<', '=', '>'},
+    'bitor': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'bitxor': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'bitand': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'shift': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'addition': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'product': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'modulus': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'exponent': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'unary': {'!', '(', '-', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'not', 'true', '{'},
+    'primary': {'(', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'true', '{'},
+    'varg': {'!', '(', '*', '-', '<', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'break', 'case', 'const', 'continue', 'do', 'enum', 'exception', 'false', 'for', 'if', 'iter', 'module', 'mutable', 'none', 'nonlocal', 'not', 'object', 'pass', 'return', 'throw', 'true', 'try', 'while', 'yield', '{'},
+    'kwarg': {'*', 'IDENTIFIER'},
+    'atom': {'(', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'true', '{'},
+    'mapping': {'{'},
+    'pair': {'!', '(', '*', '-', '<', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'break', 'case', 'const', 'continue', 'do', 'enum', 'exception', 'false', 'for', 'if', 'iter', 'module', 'mutable', 'none', 'nonlocal', 'not', 'object', 'pass', 'return', 'throw', 'true', 'try', 'while', 'yield', '{'},
+    'block': {'{'},
+    'list': {'['},
+    'range': {'(', 'IDENTIFIER', 'NUMBER', 'STRING', '[', 'false', 'none', 'true', '{'},
+    'grouping': {'('},
+    'tuple': {'('},
+    'literal': {'NUMBER', 'STRING', 'false', 'none', 'true'},
+    'string': {'STRING'},
+    'number': {'NUMBER'},
+    'boolean': {'false', 'true'},
+    'none': {'none'},
+    'identifier': {'IDENTIFIER'},
+}
+
+# Every rule, including those that macros expand to, and its expression, for drake.engine
+START = 1
+NAMES = [
+    'List[expression]',
+    'program',
+    'expression',
+    'Delimited[target]',
+    'List[target]',
+    'assignment',
+    'ASSIGN',
+    'target',
+    'typehint',
+    'List[type]',
+    'type',
+    'keyword',
+    'if',
+    'case',
+    'try',
+    'Delimited[IDENTIFIER]',
+    'List[IDENTIFIER]',
+    'for',
+    'while',
+    'iter',
+    'do',
+    'object',
+    'List[enumitem]',
+    'enum',
+    'enumitem',
+    'module',
+    'exception',
+    'mutable',
+    'throw',
+    'return',
+    'yieldfrom',
+    'yield',
+    'break',
+    'continue',
+    'pass',
+    'Delimited2[vparam, kwparam]',
+    'List2[vparam, kwparam]',
+    'lambda',
+    'vparam',
+    'kwparam',
+    'declaration',
+    'Right["or", boolxor]',
+    'boolor',
+    'Right["xor", booland]',
+    'boolxor',
+    'Right["and", inclusion]',
+    'booland',
+    'Right["in" | "not" "in", identity]',
+    'inclusion',
+    'Right["is" "not" | "is", comparison]',
+    'identity',
+    'Right[comp, bitor]',
+    'comparison',
+    'comp',
+    'Left["|", bitxor]',
+    'bitor',
+    'Left["^", bitand]',
+    'bitxor',
+    'Left["&", shift]',
+    'bitand',
+    'Left["<<" | ">>", addition]',
+    'shift',
+    'Left["+" | "-", product]',
+    'addition',
+    'Left["*" | "/", modulus]',
+    'product',
+    'Left["%", exponent]',
+    'modulus',
+    'Right["**", unary]',
+    'exponent',
+    'unary',
+    'List2[varg, kwarg]',
+    'primary',
+    'varg',
+    'kwarg',
+    'atom',
+    'List[pair]',
+    'mapping',
+    'pair',
+    'block',
+    'list',
+    'range',
+    'grouping',
+    'tuple',
+    'literal',
+    'string',
+    'number',
+    'boolean',
+    'none',
+    'identifier',
+]
+RULES = [
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((1, 2), (3, ((5, (2, ((0, 0), (1, 2))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 2))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1, 2, 3, 4, 5, 6, 10, 11, 13, 14, 15, 17, 18, 19, 22, 24, 27, 28, 29, 30, 31, 32, 33, 35, 36, 39, 40, 41, 42, 44, 45, 47, 49, 68, 80, 81, 84, 85}), False))),
+    (2, ((1, 0), (0, -1))),
+    (3, ((1, 5), (1, 11), (1, 37), (1, 40), (1, 41)), {1: (0, 4), 2: (4,), 3: (4,), 4: (4,), 5: (4,), 6: (4,), 10: (1,), 11: (1,), 13: (0, 3), 14: (1,), 15: (1,), 17: (1,), 18: (1,), 19: (4,), 22: (1,), 24: (1,), 27: (1,), 28: (1,), 29: (1,), 30: (4,), 31: (0,), 32: (4,), 33: (1,), 35: (1,), 36: (1,), 39: (1,), 40: (4,), 41: (1,), 42: (1,), 44: (1,), 45: (0, 2, 4), 47: (4,), 49: (4,), 68: (0, 2, 3), 80: (4,), 81: (2,), 84: (2,), 85: (4,)}, ()),
+    (3, ((2, ((0, 45), (1, 4), (0, 46))), (1, 7)), {1: (1,), 13: (1,), 31: (1,), 45: (0,), 68: (1,)}, ()),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((1, 7), (3, ((5, (2, ((0, 0), (1, 7))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 7))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1, 68, 13, 31}), False))),
+    (2, ((1, 3), (1, 6), (1, 2))),
+    (3, ((0, 56), (0, 57), (0, 58), (0, 59), (0, 60), (0, 61), (0, 62), (0, 63), (0, 64), (0, 65), (0, 66), (0, 67)), {56: (0,), 57: (1,), 58: (2,), 59: (3,), 60: (4,), 61: (5,), 62: (6,), 63: (7,), 64: (8,), 65: (9,), 66: (10,), 67: (11,)}, ()),
+    (2, ((4, (3, ((0, 31), (0, 13)), {13: (1,), 31: (0,)}, ()), frozenset({13, 31}), False), (4, (1, 8), frozenset({68}), False), (0, 1))),
+    (2, ((0, 68), (1, 10), (0, 70))),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((1, 10), (3, ((5, (2, ((0, 0), (1, 10))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 10))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1}), False))),
+    (2, ((0, 1), (4, (2, ((0, 47), (1, 9), (0, 48))), frozenset({47}), False))),
+    (3, ((1, 12), (1, 13), (1, 14), (1, 17), (1, 18), (1, 19), (1, 20), (1, 21), (1, 23), (1, 25), (1, 26), (1, 27), (1, 28), (1, 29), (1, 31), (1, 30), (1, 32), (1, 33), (1, 34)), {10: (16,), 11: (1,), 14: (17,), 15: (6,), 17: (8,), 18: (10,), 22: (3,), 24: (0,), 27: (5,), 28: (9,), 29: (11,), 33: (7,), 35: (18,), 36: (13,), 39: (12,), 41: (2,), 42: (4,), 44: (14, 15)}, ()),
+    (2, ((0, 24), (1, 2), (0, 38), (1, 2), (4, (2, ((0, 16), (1, 2))), frozenset({16}), False))),
+    (2, ((0, 11), (1, 72), (0, 25), (1, 77), (4, (2, ((0, 16), (1, 2))), frozenset({16}), False))),
+    (2, ((0, 41), (1, 2), (3, ((2, ((5, (2, ((0, 12), (0, 1), (4, (2, ((0, 9), (0, 1))), frozenset({9}), False), (1, 2))), frozenset({12}), False, 1), (4, (2, ((0, 20), (1, 2))), frozenset({20}), False))), (2, ((0, 20), (1, 2)))), {12: (0,), 20: (1,)}, ()))),
+    (3, ((2, ((0, 45), (1, 16), (0, 46))), (0, 1)), {1: (1,), 45: (0,)}, ()),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((0, 1), (3, ((5, (2, ((0, 0), (0, 1))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (0, 1))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1}), False))),
+    (2, ((0, 22), (1, 15), (0, 25), (1, 2), (1, 79))),
+    (2, ((0, 42), (1, 2), (1, 79))),
+    (2, ((0, 27), (3, ((1, 80), (1, 17), (1, 18)), {22: (1,), 42: (2,), 47: (0,)}, ()))),
+    (2, ((0, 15), (1, 79))),
+    (2, ((0, 33), (1, 79))),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((1, 24), (3, ((5, (2, ((0, 0), (1, 24))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 24))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1}), False))),
+    (2, ((0, 17), (4, (0, 21), frozenset({21}), False), (0, 49), (1, 22), (0, 50))),
+    (2, ((0, 1), (4, (2, ((0, 56), (1, 86))), frozenset({56}), False))),
+    (2, ((0, 28), (1, 79))),
+    (2, ((0, 18), (1, 79))),
+    (2, ((0, 29), (3, ((1, 21), (1, 77), (1, 80), (1, 83), (1, 85)), {2: (4,), 33: (0,), 45: (3,), 47: (2,), 49: (1,)}, ()))),
+    (2, ((0, 39), (1, 2))),
+    (2, ((0, 36), (1, 2))),
+    (2, ((0, 44), (0, 23), (1, 2))),
+    (2, ((0, 44), (1, 2))),
+    (0, 10),
+    (0, 14),
+    (0, 35),
+    (3, ((2, ((0, 45), (1, 36), (0, 46))), (1, 38), (1, 39)), {45: (0,), 68: (1, 2), 81: (1,), 84: (2,)}, ()),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (3, ((2, ((1, 38), (3, ((2, ((5, (2, ((0, 0), (1, 38))), frozenset({0}), False, 0), (5, (2, ((0, 0), (1, 39))), frozenset({0}), False, 1))), (5, (2, ((0, 0), (1, 38))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 38))), frozenset({51}), False, 0), (5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 39))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1, 2), 51: (2,)}, (2,)), (4, (0, 0), frozenset({0}), False))), (2, ((1, 39), (3, ((5, (2, ((0, 0), (1, 39))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 39))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False)))), {68: (0, 1), 81: (0,), 84: (1,)}, ()), frozenset({81, 68, 84}), False))),
+    (2, ((1, 35), (0, 55), (1, 2))),
+    (2, ((4, (0, 81), frozenset({81}), False), (1, 8), (0, 1))),
+    (3, ((2, ((0, 84), (1, 8), (0, 1))), (2, ((1, 8), (0, 1), (0, 52), (1, 2)))), {68: (1,), 84: (0,)}, ()),
+    (2, ((4, (0, 13), frozenset({13}), False), (1, 8), (0, 1))),
+    (2, ((1, 43), (4, (2, ((0, 34), (1, 41))), frozenset({34}), False))),
+    (1, 41),
+    (2, ((1, 45), (4, (2, ((0, 43), (1, 43))), frozenset({43}), False))),
+    (1, 43),
+    (2, ((1, 47), (4, (2, ((0, 8), (1, 45))), frozenset({8}), False))),
+    (1, 45),
+    (2, ((1, 49), (4, (2, ((3, ((0, 25), (2, ((0, 32), (0, 25)))), {25: (0,), 32: (1,)}, ()), (1, 47))), frozenset({32, 25}), False))),
+    (1, 47),
+    (2, ((1, 51), (4, (2, ((3, ((2, ((0, 26), (0, 32))), (0, 26)), {26: (0, 1)}, ()), (1, 49))), frozenset({26}), False))),
+    (1, 49),
+    (2, ((1, 54), (4, (2, ((1, 53), (1, 51))), frozenset({68, 69, 70, 71, 72, 73}), False))),
+    (1, 51),
+    (3, ((0, 68), (0, 69), (0, 70), (0, 71), (0, 72), (0, 73)), {68: (0,), 69: (1,), 70: (2,), 71: (3,), 72: (4,), 73: (5,)}, ()),
+    (2, ((1, 56), (5, (2, ((0, 74), (1, 56))), frozenset({74}), False, 0))),
+    (1, 54),
+    (2, ((1, 58), (5, (2, ((0, 75), (1, 58))), frozenset({75}), False, 0))),
+    (1, 56),
+    (2, ((1, 60), (5, (2, ((0, 76), (1, 60))), frozenset({76}), False, 0))),
+    (1, 58),
+    (2, ((1, 62), (5, (2, ((3, ((0, 77), (0, 78)), {77: (0,), 78: (1,)}, ()), (1, 62))), frozenset({77, 78}), False, 0))),
+    (1, 60),
+    (2, ((1, 64), (5, (2, ((3, ((0, 79), (0, 80)), {79: (0,), 80: (1,)}, ()), (1, 64))), frozenset({80, 79}), False, 0))),
+    (1, 62),
+    (2, ((1, 66), (5, (2, ((3, ((0, 81), (0, 82)), {81: (0,), 82: (1,)}, ()), (1, 66))), frozenset({81, 82}), False, 0))),
+    (1, 64),
+    (2, ((1, 68), (5, (2, ((0, 83), (1, 68))), frozenset({83}), False, 0))),
+    (1, 66),
+    (2, ((1, 70), (4, (2, ((0, 84), (1, 68))), frozenset({84}), False))),
+    (1, 68),
+    (3, ((2, ((3, ((0, 32), (0, 85), (0, 80)), {32: (0,), 80: (2,), 85: (1,)}, ()), (1, 70))), (1, 72)), {1: (1,), 2: (1,), 3: (1,), 4: (1,), 5: (1,), 6: (1,), 19: (1,), 30: (1,), 32: (0,), 40: (1,), 45: (1,), 47: (1,), 49: (1,), 80: (0,), 85: (0,)}, ()),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (3, ((2, ((1, 73), (3, ((2, ((5, (2, ((0, 0), (1, 73))), frozenset({0}), False, 0), (5, (2, ((0, 0), (1, 74))), frozenset({0}), False, 1))), (5, (2, ((0, 0), (1, 73))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 73))), frozenset({51}), False, 0), (5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 74))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1, 2), 51: (2,)}, (2,)), (4, (0, 0), frozenset({0}), False))), (2, ((1, 74), (3, ((5, (2, ((0, 0), (1, 74))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 74))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False)))), {1: (0, 1), 2: (0,), 3: (0,), 4: (0,), 5: (0,), 6: (0,), 10: (0,), 11: (0,), 13: (0,), 14: (0,), 15: (0,), 17: (0,), 18: (0,), 19: (0,), 22: (0,), 24: (0,), 27: (0,), 28: (0,), 29: (0,), 30: (0,), 31: (0,), 32: (0,), 33: (0,), 35: (0,), 36: (0,), 39: (0,), 40: (0,), 41: (0,), 42: (0,), 44: (0,), 45: (0,), 47: (0,), 49: (0,), 68: (0,), 80: (0,), 81: (0,), 84: (0, 1), 85: (0,)}, ()), frozenset({1, 2, 3, 4, 5, 6, 10, 11, 13, 14, 15, 17, 18, 19, 22, 24, 27, 28, 29, 30, 31, 32, 33, 35, 36, 39, 40, 41, 42, 44, 45, 47, 49, 68, 80, 81, 84, 85}), False))),
+    (2, ((1, 75), (5, (3, ((2, ((0, 53), (0, 1))), (2, ((0, 45), (1, 71), (0, 46))), (1, 80)), {45: (1,), 47: (2,), 53: (0,)}, ()), frozenset({45, 53, 47}), False, 0))),
+    (2, ((4, (0, 81), frozenset({81}), False), (1, 2))),
+    (3, ((2, ((0, 84), (1, 2))), (2, ((0, 1), (0, 52), (1, 2)))), {1: (1,), 84: (0,)}, ()),
+    (3, ((1, 77), (1, 79), (1, 80), (1, 82), (1, 83), (1, 84), (1, 89)), {1: (6,), 2: (5,), 3: (5,), 4: (5,), 5: (5,), 6: (5,), 19: (5,), 30: (5,), 40: (5,), 45: (3, 4), 47: (2,), 49: (0, 1)}, ()),
+    (2, ((4, (0, 0), frozenset({0}), False), (4, (2, ((1, 78), (3, ((5, (2, ((0, 0), (1, 78))), frozenset({0}), False, 1), (2, ((5, (2, ((0, 51), (4, (0, 0), frozenset({0}), False), (1, 78))), frozenset({51}), False, 0), (4, (0, 51), frozenset({51}), False)))), {0: (0, 1), 51: (1,)}, (1,)), (4, (0, 0), frozenset({0}), False))), frozenset({1, 2, 3, 4, 5, 6, 10, 11, 13, 14, 15, 17, 18, 19, 22, 24, 27, 28, 29, 30, 31, 32, 33, 35, 36, 39, 40, 41, 42, 44, 45, 47, 49, 68, 80, 81, 84, 85}), False))),
+    (2, ((0, 49), (1, 76), (0, 50))),
+    (2, ((1, 2), (0, 52), (1, 2))),
+    (2, ((0, 49), (1, 0), (0, 50))),
+    (2, ((0, 47), (3, ((1, 81), (1, 0)), {0: (1,), 1: (0, 1), 2: (0, 1), 3: (0, 1), 4: (0, 1), 5: (0, 1), 6: (0, 1), 10: (1,), 11: (1,), 13: (1,), 14: (1,), 15: (1,), 17: (1,), 18: (1,), 19: (0, 1), 22: (1,), 24: (1,), 27: (1,), 28: (1,), 29: (1,), 30: (0, 1), 31: (1,), 32: (1,), 33: (1,), 35: (1,), 36: (1,), 39: (1,), 40: (0, 1), 41: (1,), 42: (1,), 44: (1,), 45: (0, 1), 47: (0, 1), 49: (0, 1), 68: (1,), 80: (1,), 81: (1,), 84: (1,), 85: (1,)}, (1,)), (0, 48))),
+    (2, ((1, 72), (0, 54), (4, (1, 72), frozenset({1, 2, 3, 4, 5, 6, 40, 45, 47, 49, 19, 30}), False), (4, (2, ((0, 51), (1, 72))), frozenset({51}), False))),
+    (2, ((0, 45), (4, (0, 0), frozenset({0}), False), (1, 2), (4, (0, 0), frozenset({0}), False), (0, 46))),
+    (2, ((0, 45), (1, 0), (0, 46))),
+    (3, ((1, 85), (1, 86), (1, 87), (1, 88)), {2: (0,), 3: (1,), 4: (1,), 5: (1,), 6: (1,), 19: (2,), 30: (3,), 40: (2,)}, ()),
+    (0, 2),
+    (3, ((0, 3), (0, 4), (0, 5), (0, 6)), {3: (0,), 4: (1,), 5: (2,), 6: (3,)}, ()),
+    (3, ((0, 40), (0, 19)), {19: (1,), 40: (0,)}, ()),
+    (0, 30),
+    (0, 1),
+]
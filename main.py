@@ -1,25 +1,84 @@
-import argparse
-from drake.lexer import lex
-from drake.parser import Parser
+import argparse, sys
+from drake.cache import Cache
+from drake.engine import check
+from drake.parser import Profile, InvalidSyntax, mapped, parallel, parse, stream
+from drake.parsetree import write
+from drake.serial import dump
 
 parser = argparse.ArgumentParser(description='Compile or interpret a Drake program.')
-parser.add_argument('cmd', choices=['build', 'run'])
-parser.add_argument('file')
+parser.add_argument('cmd', choices=['build', 'run', 'check'],
+                    help='check only reports whether each file parses, and where the first error in it is')
+parser.add_argument('files', nargs='+', metavar='file')
 parser.add_argument('-o', '--output', action='store', dest='output', type=str)
+parser.add_argument('-s', '--stream', action='store_true', dest='stream',
+                    help='output each top-level expression, with its location, as soon as it is parsed')
+parser.add_argument('-j', '--jobs', action='store', dest='jobs', type=int, nargs='?', const=0,
+                    help='parse top-level expressions in parallel, with this many processes (default: one per CPU)')
+parser.add_argument('-d', '--deep', action='store_true', dest='deep',
+                    help='allow source to nest more deeply than the recursion limit would otherwise let it')
+parser.add_argument('--cache', action='store', dest='cache', type=str,
+                    help='directory of cached parse trees, to skip parsing sources that haven\'t changed')
+parser.add_argument('-b', '--binary', action='store_true', dest='binary',
+                    help='output the tree in a compact binary encoding, which drake.serial.load can read back')
+parser.add_argument('--profile-parse', action='store_true', dest='profile',
+                    help='report how often each grammar rule was attempted, failed and backtracked, and how long it took')
 
 args = parser.parse_args()
+if args.cmd == 'check':
+    failed = False
+    for file in args.files:
+        try:
+            check(file)
+        except FileNotFoundError:
+            print(f'Could not find `{file}`')
+            failed = True
+        except InvalidSyntax as e:
+            print(f'{file}: {e}')
+            failed = True
+    sys.exit(failed)
+if len(args.files) > 1:
+    parser.error(f'{args.cmd} takes one file')
+args.file, = args.files
+if args.profile and (args.stream or args.jobs is not None or args.cache):
+    parser.error('--profile-parse can\'t be used with --stream, --jobs or --cache')
 
 try:
-    with open(args.file) as f:
-        input_file = f.read()
-
-    ast = Parser(lex(input_file)).ast
-
-    if args.output:
-        with open(args.output, 'w+') as f:
-            f.write(ast.pprint())
+    if args.stream:
+        output = open(args.output, 'w+') if args.output else None
+        try:
+            for (linenum, column), node in stream(args.file):
+                print(f'@ {linenum}:{column}', node, sep='\n', file=output)
+        finally:
+            if output is not None:
+                output.close()
     else:
-        print(ast.pprint())
+        cache = Cache(args.cache) if args.cache else None
+        with mapped(args.file) as source:
+            ast = cache.get(source) if cache else None
+            profile = Profile() if args.profile else None
+            if ast is None:
+                if args.jobs is not None:
+                    ast = parallel(args.file, args.jobs or None)
+                else:
+                    ast = parse(source, args.deep, profile)
+                if cache:
+                    cache.put(source, ast)
+            if profile is not None:
+                profile.report(sys.stderr)
+
+            # Line numbers are looked up in the source, so the tree is output before it is unmapped
+            if args.binary:
+                if args.output:
+                    with open(args.output, 'wb') as f:
+                        dump(ast, f)
+                else:
+                    dump(ast, sys.stdout.buffer)
+            elif args.output:
+                with open(args.output, 'w+') as f:
+                    write(ast, f)
+            else:
+                write(ast, sys.stdout)
+                print()
 
 except FileNotFoundError:
     print(f'Could not find `{args.file}`')
@@ -2,6 +2,43 @@ import pytest
 import re
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from drake import analyser
+from drake import analyser, parsetree
 from drake.parser import Parser
 from drake.ast import *
+
+class PluginNode(parsetree.IdentifierNode):
+    __slots__ = ()
+
+@pytest.fixture
+def handlers(monkeypatch):
+    # Registrations made by a test don't outlive it
+    monkeypatch.setattr(analyser, 'HANDLERS', dict(analyser.HANDLERS))
+    monkeypatch.setattr(analyser, 'FALLBACKS', {})
+
+class TestDispatch:
+    def test_builtin(self):
+        # Test that each parse node type is analysed by the function named after it
+        assert analyser.HANDLERS[parsetree.IdentifierNode] is analyser.identifiernode
+        assert analyser.HANDLERS[parsetree.IfNode] is analyser.ifnode
+        assert parsetree.ParseNode not in analyser.HANDLERS
+
+    def test_handler(self, handlers):
+        # Test that a plugin's node type is analysed by the function it registers
+        @analyser.handler(PluginNode)
+        def pluginnode(node, scope, values):
+            return ('plugin', node.name, scope, values)
+        assert analyser.analyse(PluginNode('x'), 'scope', 'values') == ('plugin', 'x', 'scope', 'values')
+
+    def test_fallback(self, handlers):
+        # Test that a node type without a handler falls back to its nearest base's
+        analyser.handler(parsetree.IdentifierNode)(lambda node, scope, values: 'base')
+        assert analyser.analyse(PluginNode('x'), None, None) == 'base'
+        assert PluginNode not in analyser.HANDLERS
+        # Test that registering for the base afterwards replaces the fallback
+        analyser.handler(parsetree.IdentifierNode)(lambda node, scope, values: 'replaced')
+        assert analyser.analyse(PluginNode('x'), None, None) == 'replaced'
+        # Test that registering for the type itself does too
+        analyser.handler(PluginNode)(lambda node, scope, values: 'own')
+        assert analyser.analyse(PluginNode('x'), None, None) == 'own'
+        with pytest.raises(KeyError):
+            analyser.lookup(object)
@@ -0,0 +1,29 @@
+import pytest
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from drake.bytecode import ConstantPool
+
+class TestConstantPool:
+    def test_add(self):
+        pool = ConstantPool()
+        assert pool.add('a') == 0
+        assert pool.add(('1', '', '', '')) == 1
+        assert pool.add(None) == 2
+        # Test that values already in the pool keep their index
+        assert pool.add('a') == 0
+        assert pool.add(('1', '', '', '')) == 1
+        assert list(pool) == ['a', ('1', '', '', ''), None]
+        assert pool[1] == ('1', '', '', '')
+
+    def test_types(self):
+        # Test that equal values of different types are kept apart
+        pool = ConstantPool([True, 1, 1.0, False, 0])
+        assert len(pool) == 5
+        assert pool.index(True) == 0
+        assert pool.index(1) == 1
+        assert pool.index(0) == 4
+        assert 1.0 in pool
+        assert 0.0 not in pool
+        with pytest.raises(KeyError):
+            pool.index('1')
@@ -0,0 +1,53 @@
+import pytest
+import os, sys, time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from drake import cache
+from drake.cache import Cache
+from drake.parser import Parser
+
+SOURCE = 'a = [1, 2]\nf(a)\n'
+
+class TestCache:
+    def test_get_put(self, tmp_path):
+        _cache = Cache(tmp_path)
+        assert _cache.get(SOURCE) is None
+        tree = Parser(SOURCE).program()[-1]
+        _cache.put(SOURCE, tree)
+        assert _cache.get(SOURCE) == tree
+        assert _cache.get(SOURCE.encode()) == tree
+        assert _cache.get(SOURCE + ' ') is None
+        # Test that a different parser version misses
+        stamp = cache.STAMP
+        cache.STAMP = b'other'
+        try:
+            assert _cache.get(SOURCE) is None
+        finally:
+            cache.STAMP = stamp
+
+    def test_corrupt(self, tmp_path):
+        _cache = Cache(tmp_path)
+        _cache.path(SOURCE).write_bytes(b'not a tree')
+        assert _cache.get(SOURCE) is None
+        assert not _cache.path(SOURCE).exists()
+
+    def test_evict_age(self, tmp_path):
+        _cache = Cache(tmp_path, max_age=60)
+        _cache.put('a', Parser('a').program()[-1])
+        old = time.time() - 120
+        os.utime(_cache.path('a'), (old, old))
+        _cache.put('b', Parser('b').program()[-1])
+        assert not _cache.path('a').exists()
+        assert _cache.path('b').exists()
+
+    def test_evict_size(self, tmp_path):
+        _cache = Cache(tmp_path)
+        sources = ['a', 'b', 'c']
+        for i, source in enumerate(sources):
+            _cache.put(source, Parser(source).program()[-1])
+            os.utime(_cache.path(source), (i, time.time() - 10 + i))
+        # Test that the least recently used entries go first
+        _cache.get('a')
+        _cache.max_size = _cache.path('a').stat().st_size * 2
+        _cache.evict()
+        assert [_cache.path(source).exists() for source in sources] == [True, False, True]
@@ -0,0 +1,170 @@
+import pytest
+import os, random, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from drake import grammar, tables
+from drake.engine import recognise, check
+from drake.grammar import GrammarError
+from drake.lexer import lex
+from drake.parser import Parser, ParseFailed, InvalidSyntax, Memo
+
+VALID = [
+    '',
+    'a = [1, 2, f(x + 3, -4)]',
+    'b = {\n  "k": (c, d)\n  "e": none\n}',
+    'c = (<T> x, <T> y) -> x',
+    '(<T> a, **<T> b) -> a',
+    'for i in a {case i in {1: "one"} else pass}',
+    'while true {\n  x += 1\n}',
+    'try f() catch E as e g() finally h()',
+    'a = (1,\n 2,\n)',
+    'x = if a then b',
+    '(a, b) = c',
+    'a is not b and c not in d',
+    'x[1..2]',
+    'enum flags {A = 1, B}',
+    'iter [1, 2]',
+    'mutable "s"',
+    'a\n\n\nb',
+    'a, b',
+    'f(*a, **b)',
+    'a.b.c(d)[0]',
+    'yield from x',
+    'a = b = c',
+]
+INVALID = [
+    'a +',
+    'f(',
+    '1 +* 2',
+    '(<T> a, <T> b: 1) -> a',
+    'a\nb, c',
+    'if a else b',
+    'x = [1, 2',
+    'a = ?',
+]
+# Sources the parser and the engine once disagreed on
+AGREE = [
+    'f(**a)',
+    'f(**a, **b)',
+    'f(\n**a, **b)',
+    '(**<int> k) -> k',
+    '{\n1: 2,\n3: 4\n}',
+    'f(\n  a,\n  b\n)',
+    'f(a\n**b, c)',
+    'x a ..',
+    ' a',
+    '// a\nb',
+    '((a)) = 1',
+    '((<int> b)) -> b',
+]
+PIECES = ['a', '1', '"s"', '(', ')', '[', ']', '{', '}', ',', '\n', ':', '=', '->', '*', '**', '<T>', '+', '.', '..', ' ']
+
+class TestGrammar:
+    def test_tables(self):
+        # Test that the tables have been regenerated since the grammar last changed
+        with open(tables.__file__) as f:
+            assert f.read() == grammar.generate(grammar.GRAMMAR.read_text())
+
+    def test_read(self):
+        rules, macros = grammar.read('a -> "(" List[b] ")" | b  # comment\n    | "x"\nb -> IDENTIFIER?\nList[x] -> x ("," x)*')
+        assert rules == {
+            'a': ('choice', [
+                ('sequence', [('literal', '('), ('call', 'List', [('name', 'b')]), ('literal', ')')]),
+                ('name', 'b'),
+                ('literal', 'x'),
+            ]),
+            'b': ('?', ('name', 'IDENTIFIER')),
+        }
+        assert macros == {'List': (['x'], ('sequence', [('name', 'x'), ('*', ('sequence', [('literal', ','), ('name', 'x')]))]))}
+
+    def test_expand(self):
+        rules, macros = grammar.read('a -> R["+", b]\nb -> IDENTIFIER\nR[op, x] -> x (op R[op, x])?')
+        expanded = grammar.expand(rules, macros)
+        # Test that recursive macros expand to a rule that refers to itself
+        assert expanded['R["+", b]'] == ('sequence', [('rule', 'b'), ('?', ('sequence', [('literal', '+'), ('rule', 'R["+", b]')]))])
+        assert expanded['a'] == ('rule', 'R["+", b]')
+        nullable, first, _ = grammar.analyse(expanded)
+        assert not nullable['a']
+        assert grammar.keys(first['a']) == {'IDENTIFIER'}
+
+    def test_errors(self):
+        with pytest.raises(GrammarError):
+            grammar.expand(*grammar.read('a -> b'))
+        with pytest.raises(GrammarError):
+            grammar.expand(*grammar.read('a -> "nonsense"'))
+        with pytest.raises(GrammarError):
+            grammar.expand(*grammar.read('a -> M[IDENTIFIER]'))
+        with pytest.raises(GrammarError):
+            grammar.read('a -> (IDENTIFIER')
+        with pytest.raises(GrammarError):
+            grammar.read('a -> IDENTIFIER\na -> STRING')
+
+class TestEngine:
+    def test_valid(self):
+        for source in VALID:
+            Parser(lex(source)).program()
+            recognise(source)
+
+    def test_invalid(self):
+        for source in INVALID:
+            with pytest.raises(ParseFailed):
+                Parser(lex(source)).program()
+            with pytest.raises(InvalidSyntax):
+                recognise(source)
+
+    def test_agree(self):
+        # Test that the engine accepts exactly what the parser does, for the sources above and for
+        # random edits of them
+        rng = random.Random(0)
+        sources = VALID + INVALID + AGREE
+        for _ in range(2000):
+            source = rng.choice(sources)
+            for _ in range(rng.randint(1, 3)):
+                i = rng.randint(0, len(source))
+                if rng.random() < 0.5:
+                    source = source[:i] + rng.choice(PIECES) + source[i:]
+                else:
+                    source = source[:i] + source[i+rng.randint(1, 3):]
+            sources.append(source)
+        for source in sources:
+            try:
+                Parser(lex(source), memo=Memo()).program()
+                parsed = True
+            except ParseFailed:
+                parsed = False
+            try:
+                recognise(source)
+                recognised = True
+            except InvalidSyntax:
+                recognised = False
+            assert parsed == recognised, source
+
+    def test_error(self):
+        with pytest.raises(InvalidSyntax) as excinfo:
+            recognise('a = 1\nb = [1, 2\nc = 3')
+        assert (excinfo.value.linenum, excinfo.value.column) == (3, 1)
+        assert str(excinfo.value).startswith("expected ")
+        assert "']'" in str(excinfo.value)
+        assert str(excinfo.value).endswith(", got 'c' @ 3:1")
+        with pytest.raises(InvalidSyntax) as excinfo:
+            recognise('f(')
+        assert str(excinfo.value).endswith(' @ 1:3')
+
+    def test_deep(self):
+        recognise('a = ' + '('*2000 + '1' + ')'*2000)
+        with pytest.raises(InvalidSyntax):
+            recognise('a = ' + '('*2000 + '1' + ')'*1999)
+
+    def test_check(self, tmp_path):
+        path = tmp_path / 'valid.dk'
+        path.write_text('a = [1, 2, f(x + 3, -4)]\nc = (<T> x, <T> y) -> x\n(a, b) = c\n')
+        check(path)
+        path = tmp_path / 'invalid.dk'
+        path.write_text('a = 1\nb = [1, 2\nc = 3')
+        with pytest.raises(InvalidSyntax) as excinfo:
+            check(path)
+        assert (excinfo.value.linenum, excinfo.value.column) == (3, 1)
+        # Test that empty files can be checked, though they can't be mapped
+        path = tmp_path / 'empty.dk'
+        path.write_text('')
+        check(path)
@@ -0,0 +1,75 @@
+import pytest
+import re
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from drake import lexer
+from drake.lexer import lex, KINDS
+from drake.parser import Parser
+
+def kinds(source):
+    return list(lex(source).kinds)
+
+def texts(source):
+    tokens = lex(source)
+    return [tokens.text(index) for index in range(len(tokens))]
+
+class TestLex:
+    def test_skipped(self):
+        # Test that whitespace and comments produce no tokens
+        assert kinds('   // comment') == []
+        # Test that newlines are kept
+        assert kinds('\n\r\n\r') == [lexer.KIND_NEWLINE]*3
+        assert texts('a // comment\nb') == ['a', '\n', 'b']
+
+    def test_offsets(self):
+        tokens = lex('ab  cd')
+        assert list(tokens.starts) == [0, 4]
+        assert list(tokens.ends) == [2, 6]
+
+    def test_keywords(self):
+        # Test that keywords get their own kind, and identifiers containing them don't
+        assert kinds('if iffy') == [KINDS['if'], lexer.KIND_IDENTIFIER]
+        assert kinds('for flags') == [KINDS['for'], KINDS['flags']]
+
+    def test_operators(self):
+        # Test that the longest operator is matched
+        assert texts('a<=b**=c..d->e') == ['a', '<=', 'b', '**=', 'c', '..', 'd', '->', 'e']
+        assert kinds('<<=') == [KINDS['<<=']]
+
+    def test_literals(self):
+        assert kinds("'a' \"b\"") == [lexer.KIND_STRING]*2
+        assert kinds('0b_10 0o17 0x3f 1.5e3j') == [
+            lexer.KIND_BINARY,
+            lexer.KIND_OCTAL,
+            lexer.KIND_HEXADECIMAL,
+            lexer.KIND_DECIMAL
+        ]
+        # Test that a range doesn't lex as a decimal
+        assert texts('1..2') == ['1', '..', '2']
+
+    def test_error(self):
+        assert kinds('@') == [lexer.KIND_ERROR]
+
+class TestTokenStream:
+    def test_find(self):
+        tokens = lex('ab  cd')
+        assert tokens.find(4) == 1
+        assert tokens.find(3) == -1
+
+    def test_skip(self):
+        tokens = lex('ab  // comment\ncd')
+        assert tokens.skip(2) == 14
+        assert tokens.skip(1) is None
+        assert lex('ab  ').skip(2) == 4
+
+class TestParserTokens:
+    def test_parse(self):
+        # Test that parsing from a token stream gives the same tree as from the source
+        for source in ['a = [1, 2]\nf(a)', '{a: b.c[0..]}', '(a, b) = c << 0x1f']:
+            assert Parser(lex(source)).program() == Parser(source).program()
+
+    def test_operators(self):
+        # Test that a token stream only matches whole operators
+        assert Parser(lex('<=')).attempt('<') is None
+        assert Parser(lex('<=')).attempt('<=').cursor == 2
+        assert Parser(lex('iffy')).attempt('if') is None
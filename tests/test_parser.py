@@ -1,9 +1,10 @@
 import pytest
 import re
-import os, sys
+import io, os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from drake import parser
-from drake.parser import Parser, ParseFailed
+from drake.lexer import lex
+from drake.parser import Parser, ParseFailed, Memo, Profile
 from drake.parsetree import *
 
 ASSIGNMENT = AssignmentNode(TargetNode('', None, IdentifierNode('a')), '=', NumberNode('0'))
@@ -13,6 +14,34 @@ class TestParserAttributes:
     def test_location(self):
         p = Parser('\n\n\n01234567', cursor=9)
         assert p.location == (4, 7)
+        # Test that derived parsers share the line index
+        assert p._with(cursor=3).lines is p.lines
+        assert p._with(cursor=3).location == (4, 1)
+        assert p._with(cursor=0).location == (1, 1)
+        # Test mixed line endings
+        p = Parser('a\r\nb\rc\nd', cursor=7)
+        assert p.location == (4, 1)
+
+    def test_node_location(self):
+        # Test that nodes keep an offset, and work out their location from the parser's line index
+        p = Parser('a = 0\n\nb = f(a)').program()
+        node = p[-1].definition.expressions[1].expression
+        assert node.offset == 11
+        assert node.lines is p.lines
+        assert node.location == (3, 5)
+        assert IdentifierNode('a').location == (0, 0)
+        assert not hasattr(node, '__dict__')
+
+    def test_symbols(self):
+        # Test that equal names, literals and operators in a parse are all the same object
+        source = 'name = name_ + "s"\nname_ = name + "s"'
+        for source in (source, parser.lex(source)):
+            p = Parser(source).program()
+            first, second = p[-1].definition.expressions
+            assert first.targets.name.name is second.expression.left.name
+            assert first.expression.left.name is second.targets.name.name
+            assert first.expression.right.value is second.expression.right.value
+            assert first.expression.operator is second.expression.operator is parser.SYMBOLS['+']
 
     def test_getitem(self):
         p = Parser('', parsed=('a', 'b', 'c', 'd'))
@@ -47,6 +76,69 @@ class TestParserInternal:
         assert item.args == ('test', 'a')
         assert p.parsed == (item,)
 
+    def test_backtracking(self):
+        p = Parser('test string', parsed=('test',))
+        # Test that derived parsers share the output stack rather than copying it
+        p1 = p.addparsed('a')
+        assert p1.state is p.state
+        # Test that abandoning a branch and deriving from an earlier parser leaves it intact
+        p2 = p1.addparsed('b').withnode(parser.List, args=2)
+        assert p2.parsed == ('test', ['a', 'b'])
+        p3 = p.addparsed('c')
+        assert p.parsed == ('test',)
+        assert p3.parsed == ('test', 'c')
+        assert p3[-1] == 'c'
+        with pytest.raises(IndexError):
+            p[1]
+
+    def test_memo(self):
+        memo = Memo()
+        p = Parser('a + b', memo=memo)
+        # Test that memoised results are the same as unmemoised ones
+        assert p.boolor() == Parser('a + b').boolor()
+        misses = memo.misses
+        # Test that reapplying a rule at the same position is a hit
+        hits = memo.hits
+        assert p.boolor()[-1] == Parser('a + b').boolor()[-1]
+        assert memo.hits == hits + 1
+        assert memo.misses == misses
+        # Test that failures are memoised too
+        memo = Memo()
+        p = Parser('a', memo=memo)
+        with pytest.raises(ParseFailed):
+            p.string()
+        assert (memo.hits, memo.misses) == (0, 1)
+        with pytest.raises(ParseFailed) as excinfo:
+            p.string()
+        assert (memo.hits, memo.misses) == (1, 1)
+        assert excinfo.value.pattern == 'string'
+        # Test that failures are kept without the exceptions raised for them, and their tracebacks
+        assert not any(isinstance(result, BaseException) for result in memo.table.values())
+
+    def test_profile(self):
+        source = 'a = f(x)\nf(a, b)'
+        profile = Profile()
+        tree = Parser(source, profile=profile).program()[-1]
+        # Test that profiling doesn't change the result
+        assert tree == Parser(source).program()[-1]
+        stats = profile.rules['assignment']
+        assert stats.successes == 1
+        assert stats.failures > 0
+        # Test that backtracking over the target of the failed assignment counts as rescanning it
+        assert profile.rules['boolor'].rescanned > 0
+        assert profile.rules['program'].rescanned == 0
+        for stats in profile.rules.values():
+            assert stats.attempts == stats.successes + stats.failures
+        # Test that memo hits are counted
+        profile = Profile()
+        Parser(source, memo=Memo(), profile=profile).program()
+        assert sum(stats.hits for stats in profile.rules.values()) > 0
+        report = io.StringIO()
+        profile.report(report)
+        assert report.getvalue().splitlines()[0].split() == [
+            'rule', 'attempts', 'successes', 'failures', 'hits', 'rescanned', 'time'
+        ]
+
 class TestParserBasicMatching:
     def test_raw_match(self):
         p = Parser('test string')
@@ -80,6 +172,50 @@ class TestParserBasicMatching:
         # Test that parse=True does add the match to .parsed
         assert p.match(parser.IDENTIFIER, 'identifier', parse=True).parsed == ('test',)
 
+    def test_attempt(self):
+        p = Parser('test string')
+        # Test that a failed attempt gives None rather than raising
+        assert p.attempt('foo') is None
+        assert p.raw_attempt(parser.DECIMAL) is None
+        assert p.attempt_choices('foo', 'bar') is None
+        # Test that a successful attempt is the same as a match
+        assert p.attempt('test') == p.match('test')
+        assert p.attempt(parser.IDENTIFIER, parse=True) == p.match(parser.IDENTIFIER, parse=True)
+        assert p.attempt_choices('foo', 'test') == p.match('test')
+        # Test that keywords only match whole words, with or without the lexer
+        for source in ['notb', 'not!', 'not?']:
+            assert Parser(source).attempt('not') is None
+            assert Parser(lex(source)).attempt('not') is None
+        assert Parser('not b').attempt('not') is not None
+        assert Parser(b'notb').attempt('not') is None
+        for source in ['a = notb', 'x = if a thenb else c']:
+            try:
+                expected = Parser(lex(source)).program()[-1]
+            except ParseFailed:
+                with pytest.raises(ParseFailed):
+                    Parser(source).program()
+            else:
+                assert Parser(source).program()[-1] == expected
+
+    def test_peek(self):
+        assert Parser('if a').peek() == 'if'
+        assert Parser('iffy').peek() == 'IDENTIFIER'
+        assert Parser('0x1f').peek() == 'NUMBER'
+        assert Parser("'a'").peek() == 'STRING'
+        assert Parser('(a)').peek() == '('
+        assert Parser('').peek() == ''
+
+    def test_parsefailed(self):
+        with pytest.raises(ParseFailed) as excinfo:
+            Parser('\n  foo', cursor=3).match('bar')
+        # Test that the location and message are worked out from the cursor
+        e = excinfo.value
+        assert e.cursor == 3
+        assert e.pattern == "'bar'"
+        assert e.location == (2, 3)
+        assert (e.linenum, e.column) == (2, 3)
+        assert str(e) == "failure matching 'bar' @ 2:3"
+
     def test_newline(self):
         # Test that \n, \r\n, and \r are all treated as newlines
         p = Parser('\n').newline()
@@ -130,6 +266,27 @@ class TestParserGenericMatching:
         assert Parser('none,\nnone,').nodelist(Parser.none)[-1] == [NoneNode()]*2
         # Test optional leading and trailing newlines
         assert Parser('\nnone\n').nodelist(Parser.none)[-1] == [NoneNode()]
+        # Test empty list
+        assert Parser('').nodelist(Parser.none)[-1] == []
+        # Test that each item is only matched once
+        profile = Profile()
+        Parser('none, none, none', profile=profile).nodelist(Parser.none)
+        assert profile.rules['none'].attempts == 3
+
+    def test_nodelist2(self):
+        # Test both kinds of item
+        p = Parser('none, true, false').nodelist2(Parser.none, Parser.boolean)
+        assert p.parsed == ([NoneNode()], [BooleanNode('true'), BooleanNode('false')])
+        p = Parser('none\nnone\ntrue').nodelist2(Parser.none, Parser.boolean)
+        assert p.parsed == ([NoneNode()]*2, [BooleanNode('true')])
+        # Test only one kind of item
+        assert Parser('none, none').nodelist2(Parser.none, Parser.boolean).parsed == ([NoneNode()]*2, [])
+        assert Parser('true,').nodelist2(Parser.none, Parser.boolean).parsed == ([], [BooleanNode('true')])
+        assert Parser('').nodelist2(Parser.none, Parser.boolean).parsed == ([], [])
+        # Test that the first kind can't follow the second
+        p = Parser('true, none').nodelist2(Parser.none, Parser.boolean)
+        assert p.parsed == ([], [BooleanNode('true')])
+        assert p.cursor == 6
 
     def test_delimitedlist(self):
         # Test delimited multiple items
@@ -145,31 +302,47 @@ class TestParserGenericMatching:
         p = Parser('none').delimitedlist(Parser.none)
         assert p[-1] == NoneNode()
 
-    def test_leftrecurse(self):
+    def test_binaryop(self):
+        # Test that the longest operator is matched
+        p, operator = Parser('<= b').binaryop()
+        assert (p.cursor, operator) == (3, '<=')
+        # Test multi-word operators
+        assert Parser('not in b').binaryop()[1] == 'not in'
+        assert Parser('is not b').binaryop()[1] == 'is not'
+        assert Parser('is b').binaryop()[1] == 'is'
+        assert Parser('not b').binaryop() is None
+        # Test that word operators don't match the start of an identifier
+        assert Parser('orange').binaryop() is None
+        assert Parser('= b').binaryop() is None
+
+    def test_binary(self):
         # Test no operations
-        p = Parser('none').leftrecurse(Parser.none, '+')
-        assert p[-1] == NoneNode()
-        # Test any given operator can be matched
-        p = Parser('none + none').leftrecurse(Parser.none, '+', '-')
-        assert p[-1] == BinaryOpNode(NoneNode(), '+', NoneNode())
-        p = Parser('none - none').leftrecurse(Parser.none, '+', '-')
-        assert p[-1] == BinaryOpNode(NoneNode(), '-', NoneNode())
-        # Test multiple operations
-        p = Parser('none + none - none').leftrecurse(Parser.none, '+', '-')
+        assert Parser('none').binary()[-1] == NoneNode()
+        # Test left associativity
+        p = Parser('none + none - none').binary()
         assert p[-1] == BinaryOpNode(BinaryOpNode(NoneNode(), '+', NoneNode()), '-', NoneNode())
-
-    def test_rightrecurse(self):
-        # Test no operations
-        p = Parser('none').rightrecurse(Parser.none, '+')
-        assert p[-1] == NoneNode()
-        # Test any given operator can be matched
-        p = Parser('none + none').rightrecurse(Parser.none, '+', '-')
-        assert p[-1] == BinaryOpNode(NoneNode(), '+', NoneNode())
-        p = Parser('none - none').rightrecurse(Parser.none, '+', '-')
-        assert p[-1] == BinaryOpNode(NoneNode(), '-', NoneNode())
-        # Test multiple operations
-        p = Parser('none + none - none').rightrecurse(Parser.none, '+', '-')
-        assert p[-1] == BinaryOpNode(NoneNode(), '+', BinaryOpNode(NoneNode(), '-', NoneNode()))
+        # Test right associativity
+        p = Parser('none < none <= none').binary()
+        assert p[-1] == BinaryOpNode(NoneNode(), '<', BinaryOpNode(NoneNode(), '<=', NoneNode()))
+        # Test mixed precedence
+        p = Parser('a + b * c - d').binary()
+        assert p[-1] == BinaryOpNode(
+            BinaryOpNode(
+                IdentifierNode('a'),
+                '+',
+                BinaryOpNode(IdentifierNode('b'), '*', IdentifierNode('c'))
+            ),
+            '-',
+            IdentifierNode('d')
+        )
+        # Test that a minimum level leaves looser operators alone
+        p = Parser('a * b + c').binary(parser.LEVELS['product'])
+        assert p.cursor == 6
+        assert p[-1] == BinaryOpNode(IdentifierNode('a'), '*', IdentifierNode('b'))
+        # Test that an operator with no right operand is left unparsed
+        p = Parser('a += b').binary()
+        assert p.cursor == 2
+        assert p[-1] == IdentifierNode('a')
 
 class TestParserNodeMatching:
     def test_program(self):
@@ -253,6 +426,24 @@ class TestParserNodeMatching:
             ]
         )
 
+    def test_dispatch(self):
+        # Test that only alternatives that can start with the next token are tried
+        assert parser.EXPRESSION['<'] == (Parser.assignment, Parser.lambda_, Parser.declaration)
+        assert parser.KEYWORD['yield'] == (Parser.yield_, Parser.yieldfrom)
+        assert parser.ATOM['{'] == (Parser.mapping, Parser.block)
+        # Test that nothing being able to start there is a plain failure
+        with pytest.raises(ParseFailed) as excinfo:
+            Parser('@').expression()
+        assert excinfo.value.pattern == 'expression'
+        # Test that letters identifiers can't contain are a plain failure too
+        for source in ('é = 1', 'x = [ß]'):
+            with pytest.raises(ParseFailed):
+                Parser(source).program()
+            with pytest.raises(ParseFailed):
+                Parser(lex(source)).program()
+        with pytest.raises(ParseFailed):
+            Parser('iffy').keyword()
+
     def test_keyword(self):
         assert Parser('if a then b').keyword() == Parser('if a then b').if_()
         assert Parser('case a in {}').keyword() == Parser('case a in {}').case()
@@ -833,6 +1024,36 @@ class TestParserNodeMatching:
         assert p.cursor == 5
         assert p[-1] == TupleNode([ASSIGNMENT])
 
+    def test_parenthesised(self):
+        # Test that a parenthesised list is reinterpreted by what follows it
+        assert Parser('(a, b) = 0').expression() == Parser('(a, b) = 0').assignment()
+        assert Parser('(<T> a) -> a').expression() == Parser('(<T> a) -> a').lambda_()
+        assert Parser('(a=0)').expression()[-1] == ASSIGNMENT
+        assert Parser('(a, b)').expression()[-1] == TupleNode([IdentifierNode('a'), IdentifierNode('b')])
+        assert Parser('(a,)').expression()[-1] == TupleNode([IdentifierNode('a')])
+        # Test that operations on a grouping or tuple are still parsed
+        p = Parser('(a, b).c + 1').expression()
+        assert p[-1] == BinaryOpNode(
+            LookupNode(TupleNode([IdentifierNode('a'), IdentifierNode('b')]), IdentifierNode('c')),
+            '+',
+            NumberNode('1')
+        )
+        assert Parser('(a) == b').expression()[-1] == BinaryOpNode(IdentifierNode('a'), '==', IdentifierNode('b'))
+        # Test that targets and parameters aren't expressions
+        with pytest.raises(ParseFailed):
+            Parser('(nonlocal a)').expression()
+        with pytest.raises(ParseFailed):
+            Parser('1 + (*<T> a)').program()
+        # Test that a grouping inside the list is never a target or parameter
+        for source in ['((a)) = 1', '(a, (b)) = 1', '((<int> a)) = 1', '((<int> b)) -> b']:
+            with pytest.raises(ParseFailed):
+                Parser(source).program()
+        assert Parser('(a, (b))').expression()[-1] == TupleNode([IdentifierNode('a'), IdentifierNode('b')])
+        # Test that each item is only matched once, however deeply the lists nest
+        profile = Profile()
+        Parser('((((a, b), c), d), e) = 0', profile=profile).expression()
+        assert profile.rules['cover'].attempts == 4
+
     def test_literal(self):
         # Test string
         assert Parser("'test'").literal()[-1] == StringNode("'test'")
@@ -905,3 +1126,190 @@ class TestParserNodeMatching:
         # Test reserved words don't parse
         with pytest.raises(ParseFailed):
             Parser('true').identifier()
+
+class TestParserDeep:
+    def test_deep(self):
+        depth = 500
+        source = 'a = ' + '['*depth + '1' + ']'*depth
+        with pytest.raises(RecursionError):
+            Parser(source, memo=Memo()).program()
+        tree = Parser(source, memo=Memo(), deep=True).program()[-1]
+        node = tree.definition.expressions[0].expression
+        for _ in range(depth-1):
+            node = node.items[0]
+        assert node == ListNode([NumberNode('1')])
+        # Test that deep trees can be rendered too
+        assert str(tree).count('List') == depth
+
+    def test_parse(self):
+        # Test the whole-program entry point main uses, which must not reparse each level of nesting
+        # once for every alternative that fails on it
+        for depth, deep in [(12, False), (250, True)]:
+            source = 'a = ' + '['*depth + 'f(' + '['*depth + '1' + ']'*depth + ')' + ']'*depth
+            tree = parser.parse(source, deep)
+            assert str(tree) == str(Parser(source, memo=Memo(), deep=deep).program()[-1])
+        profile = Profile()
+        assert parser.parse('a = [[1]]', profile=profile) == Parser('a = [[1]]').program()[-1]
+        assert profile.rules['primary'].hits
+
+    def test_shallow(self):
+        # Test that a deep parse gives the same tree when it doesn't need any more stacks
+        source = 'a = {"k": [1, (2, f(x))]}\nb = f(a, x=1)'
+        assert Parser(source, deep=True).program()[-1] == Parser(source).program()[-1]
+        assert str(Parser(source, deep=True).program()[-1]) == str(Parser(source).program()[-1])
+
+class TestParserStreaming:
+    def test_toplevel(self):
+        lines = io.StringIO('a = [1,\n 2], b\n\n"(", c', newline='')
+        assert list(parser.toplevel(lines)) == [
+            (1, 1, 'a = [1,\n 2]', ','),
+            (2, 5, ' b', '\n'),
+            (3, 1, '', '\n'),
+            (4, 1, '"("', ','),
+            (4, 5, ' c', ''),
+        ]
+
+    def test_stream(self):
+        # Test that each expression comes with its location in the whole source
+        source = 'a=0\n\n(a, a) = f(\n  0\n)\n'
+        items = list(parser.stream(io.StringIO(source, newline='')))
+        assert [location for location, _ in items] == [(1, 1), (3, 1)]
+        assert [node for _, node in items] == Parser(source).program()[-1].definition.expressions
+        assert items[1][1].expression.location == (3, 10)
+        # Test comma separators
+        items = list(parser.stream(io.StringIO('a=0, a=0,\n a=0,', newline='')))
+        assert [location for location, _ in items] == [(1, 1), (1, 6), (2, 2)]
+        assert [node for _, node in items] == [ASSIGNMENT]*3
+        # Test that sources succeed or fail as they do for a program
+        for source in ['a\n,b', 'a\n\n,b', '  a\n  b', '// c\na', '  ', 'a,\n b', '\n  a\n  b', '\n// c\na']:
+            try:
+                expected = Parser(source).program()[-1].definition.expressions
+            except parser.ParserError:
+                with pytest.raises(parser.ParserError):
+                    list(parser.stream(io.StringIO(source, newline='')))
+            else:
+                items = list(parser.stream(io.StringIO(source, newline='')))
+                assert [node for _, node in items] == expected
+
+    def test_stream_path(self, tmp_path):
+        path = tmp_path / 'test.dk'
+        path.write_text('a=0\r\na=0\r\n', newline='')
+        items = list(parser.stream(path))
+        assert [location for location, _ in items] == [(1, 1), (2, 1)]
+
+    def test_stream_separators(self):
+        # Test that mixing separators is invalid, as for a program
+        for source in ['a\nb, c', 'a, b\nc', 'a\nb,', 'a,,b', ', a']:
+            with pytest.raises(parser.ParserError):
+                list(parser.stream(io.StringIO(source, newline='')))
+
+    def test_parallel(self, tmp_path):
+        # Test that the same tree is given as by Parser.program, locations and all
+        path = tmp_path / 'test.dk'
+        source = 'a=0\n\n(a, a) = f(\n  0\n)\n' * 5
+        path.write_text(source, newline='')
+        module = parser.parallel(path, workers=2)
+        tree = Parser(source).program()[-1]
+        assert module == tree
+        assert locations(module) == locations(tree)
+        assert parser.parallel(io.StringIO('')) == Parser('').program()[-1]
+        with pytest.raises(parser.ParserError):
+            parser.parallel(io.StringIO('a\nb, c'))
+        with pytest.raises(ParseFailed):
+            parser.parallel(io.StringIO('a\nb = )'), workers=2)
+
+    def test_bytes(self):
+        # Test that a bytes source parses to the same tree, with str text in its nodes
+        source = 'x = "hé" + 0x1F\ny = not a and b is not c // é\nz = [1..3]\n'
+        assert Parser(source.encode()).program()[-1] == Parser(source).program()[-1]
+        node = Parser(source.encode()).program()[-1].definition.expressions[0]
+        assert type(node.targets.name.name) is str
+        assert type(node.expression.left.value) is str
+        # Test that locations count bytes
+        with pytest.raises(ParseFailed) as e:
+            Parser('"é" )'.encode()).program()
+        assert e.value.location == (1, 6)
+
+    def test_mapped(self, tmp_path):
+        path = tmp_path / 'test.dk'
+        path.write_text('a=0\r\nf(a)\r\n', newline='')
+        with parser.mapped(path) as source:
+            assert Parser(source).program()[-1] == Parser('a=0\r\nf(a)\r\n').program()[-1]
+        # Test that failures can still be located once the map is closed
+        path.write_text(')')
+        with pytest.raises(ParseFailed) as e:
+            with parser.mapped(path) as source:
+                Parser(source).program()
+        assert e.value.location == (1, 1)
+        # Test that empty files can be parsed, though they can't be mapped
+        path.write_text('')
+        with parser.mapped(path) as source:
+            assert Parser(source).program()[-1] == Parser('').program()[-1]
+
+def locations(node):
+    return [node.location] + [child.location for child in parser.descendants(node)]
+
+class TestDocument:
+    SOURCE = 'a = [1, 2, f(x + 3)]\nb = {\n  "k": (c, d)\n}\n\ne = a * b // done\n'
+
+    def check(self, document):
+        tree = Parser(lex(document.source)).program()[-1]
+        assert document.tree == tree
+        assert sorted(locations(document.tree)) == sorted(locations(tree))
+
+    def test_edits(self):
+        # Test edits inside items, across lines, and ones that change where items stop
+        index = self.SOURCE.index
+        for offset, removed, inserted in [
+            (index('x'), 1, 'y'), (index('3'), 0, '2 * '), (index('(c'), 1, '(\n    '), (index('c'), 1, 'cc, 5'),
+            (index('1'), 0, '0, '), (index('='), 1, '+='), (0, 0, 'z\n'), (index('\nb'), 0, '  '),
+            (index('//'), 7, ''), (index(']'), 0, ', []'), (len(self.SOURCE), 0, 'g'),
+        ]:
+            document = parser.Document(self.SOURCE)
+            document.edit(offset, removed, inserted)
+            self.check(document)
+
+    def test_reuse(self):
+        document = parser.Document(self.SOURCE)
+        first, second, third = document.tree.definition.expressions
+        document.edit(self.SOURCE.index('x'), 1, 'y + 1')
+        self.check(document)
+        expressions = document.tree.definition.expressions
+        assert expressions[1] is second and expressions[2] is third
+        assert expressions[0].expression.items[0] is first.expression.items[0]
+        assert third.location == (6, 1)
+
+    def test_successive(self):
+        document = parser.Document(self.SOURCE)
+        source = self.SOURCE
+        for old, new in [('x', 'y'), ('a =', 'aa ='), ('d)', 'dd)'), ('dd', 'dd, 2')]:
+            offset = source.index(old)
+            document.edit(offset, len(old), new)
+            source = source[:offset] + new + source[offset+len(old):]
+            assert document.source == source
+            self.check(document)
+
+    def test_words(self):
+        # Test that an edit joining a keyword to the next word makes them one identifier, as a full parse does
+        document = parser.Document('a = [not b, 1]\nc = 2')
+        document.edit(document.source.index(' b'), 1, '')
+        assert document.tree.definition.expressions[0].expression.items[0] == IdentifierNode('notb')
+        self.check(document)
+        source = 'enum {a\nb\nc}\nmodule {x = 1\ny = 2}\nq = try a catch b c'
+        document = parser.Document(source)
+        with pytest.raises(ParseFailed):
+            document.edit(source.index(' b c'), 3, 'x ')
+        assert document.tree is None
+        document = parser.Document('x = [if a then b else c]')
+        with pytest.raises(ParseFailed):
+            document.edit(document.source.index(' c'), 2, 'yy')
+
+    def test_invalid(self):
+        # Test that a tree is only given while the source parses
+        document = parser.Document(self.SOURCE)
+        with pytest.raises(parser.ParserError):
+            document.edit(4, 0, '(')
+        assert document.tree is None
+        document.edit(4, 1, '')
+        assert document.source == self.SOURCE
+        self.check(document)
@@ -0,0 +1,41 @@
+import pytest
+import io, os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from drake.parser import Parser
+from drake.parsetree import *
+from drake.parsetree import write
+
+def written(node):
+    output = io.StringIO()
+    write(node, output)
+    return output.getvalue()
+
+class TestWrite:
+    def test_primary(self):
+        # Test that nodes whose arguments are all primary go on one line
+        node = BinaryOpNode(IdentifierNode('a'), '+', NumberNode('1'))
+        assert written(node) == 'Binary + ( Identifier a, Number 1 )'
+        assert written(CallNode(IdentifierNode('f'), [], [])) == 'Call (\n  Identifier f,\n  (  ),\n  (  )\n)'
+
+    def test_nested(self):
+        node = ListNode([NumberNode('1'), ListNode([StringNode('"a"'), NoneNode()])])
+        assert written(node) == 'List (\n  Number 1,\n  List ( String "a", None )\n)'
+        # Test that lists are laid out without a name
+        node = ForNode([IdentifierNode('a'), IdentifierNode('b')], IdentifierNode('c'), BlockNode([]))
+        assert written(node) == 'For (\n  ( Identifier a, Identifier b ),\n  Identifier c,\n  Block (  )\n)'
+        # Test that missing arguments are left out
+        node = RangeNode(NumberNode('1'), None, NumberNode('2'))
+        assert written(node) == 'Range (\n  Number 1,\n  Number 2\n)'
+
+    def test_str(self):
+        # Test that str() gives the same as writing
+        tree = Parser('a = {"k": [1, (2, f(x, y=1))]}\nb = (c, d) = e').program()[-1]
+        assert str(tree) == written(tree)
+        assert str(tree).startswith('Module (\n  Block (\n    Assign (\n      Identifier a,\n      Mapping (')
+
+    def test_deep(self):
+        node = NumberNode('1')
+        for _ in range(5000):
+            node = ListNode([node])
+        # The innermost list fits on one line
+        assert written(node).count('\n') == 4999*2
@@ -0,0 +1,62 @@
+import pytest
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from drake.scopes import Scope, Binding, NameNotFound, builtins
+from drake.types import Number
+
+class TestScope:
+    def test_index(self):
+        scope = Scope(Binding('a', None), Binding('b', None))
+        assert scope.index('b') == (1, 0)
+        child = scope.child(Binding('c', None))
+        assert child.index('c') == (0, 0)
+        assert child.child().index('a') == (0, 2)
+        # Test local and non-local lookups
+        with pytest.raises(NameNotFound) as excinfo:
+            child.index('a', local=True)
+        assert excinfo.value.local is True
+        with pytest.raises(NameNotFound):
+            child.index('c', local=False)
+        with pytest.raises(NameNotFound):
+            child.index('d')
+
+    def test_bind(self):
+        scope = Scope()
+        assert scope.bind('a', Number) == (0, 0)
+        assert scope.bind('b', Number) == (1, 0)
+        # Test that rebinding a name reuses its binding
+        assert scope.bind('a', Number) == (0, 0)
+        assert len(scope.bindings) == 2
+        # Test that a non-local binding must already exist
+        with pytest.raises(NameNotFound):
+            scope.child().bind('c', Number, local=False)
+
+    def test_resolved(self):
+        outer = Scope(Binding('a', None))
+        middle = outer.child()
+        inner = middle.child()
+        assert inner.index('a') == (0, 2)
+        assert inner.resolved['a'][:2] == (0, 2)
+        assert inner.index('a') == (0, 2)
+        # Test that a new binding between a scope and where it found a name shadows it
+        middle.bind('b', None)
+        assert inner.index('a') == (0, 2)
+        assert middle.bind('a', None) == (1, 0)
+        assert inner.index('a') == (1, 1)
+        inner.bind('a', None)
+        assert inner.index('a') == (0, 0)
+        assert inner.index('a', local=False) == (1, 1)
+
+    def test_trees(self):
+        # Test that separate trees of scopes don't share their counts of bindings, nor the builtins'
+        first, second = Scope(Binding('a', None)), Scope()
+        assert first.shadows is not second.shadows
+        assert first.child().shadows is first.shadows
+        assert 'a' not in second.shadows and 'a' not in builtins.shadows
+        # Test that a binding in one tree leaves what the other has found in place
+        inner = second.child()
+        second.bind('b', None)
+        assert inner.index('b') == (0, 1)
+        first.bind('b', None)
+        assert inner.resolved['b'][2] == second.shadows['b']
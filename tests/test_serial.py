@@ -0,0 +1,89 @@
+import pytest
+import io, os, pickle, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from drake import ast, scopes, serial, types
+from drake.parser import Parser, parallel
+from drake.parsetree import *
+from drake.parsetree import descendants
+from drake.serial import FormatError
+
+SOURCE = '''a = [1, 2, f(x + 3, y=-4)]
+b = {
+  "k": (c, d)
+  "é": none
+}
+c = (<T> x, <T> y) -> if x then "k" else y
+for i in a {case i in {1: "one"} else pass}
+'''
+
+def locations(tree):
+    return [node.location for node in descendants(tree)]
+
+class TestSerial:
+    def test_roundtrip(self):
+        tree = Parser(SOURCE).program()[-1]
+        data = serial.dumps(tree)
+        loaded = serial.loads(data)
+        assert loaded == tree
+        assert str(loaded) == str(tree)
+        assert locations(loaded) == locations(tree)
+        # Test that every node shares the one line index
+        assert len({id(node.lines) for node in descendants(loaded)}) == 1
+        # Test that repeated strings are only stored once
+        assert data.count(b'"k"') == 1
+
+    def test_file(self, tmp_path):
+        path = tmp_path / 'program.dk'
+        path.write_text(SOURCE)
+        tree = parallel(path)
+        with open(tmp_path / 'program.tree', 'wb') as f:
+            serial.dump(tree, f)
+        with open(tmp_path / 'program.tree', 'rb') as f:
+            loaded = serial.load(f)
+        assert loaded == tree
+        assert locations(loaded) == locations(tree)
+
+    def test_scopes(self):
+        # Test that loaded scopes are indexed by name as the originals were
+        outer = scopes.Scope(scopes.Binding('x', types.Number), scopes.Binding('y', types.String))
+        inner = outer.child(scopes.Binding('y', types.Number))
+        tree = ast.BlockNode(types.Block, [ast.IdentifierNode(types.Number, 0, 1)], inner)
+        loaded = serial.loads(serial.dumps(tree))
+        assert loaded == tree
+        scope = loaded.locals
+        assert scope.names == inner.names and scope.parent.names == outer.names
+        assert scope.shadows is scope.parent.shadows
+        assert scope.index('y') == (0, 0)
+        assert scope.index('x') == (0, 1)
+        assert scope.getname('x') == scopes.Binding('x', types.Number)
+        # Test that a binding made after loading shadows the one found before it
+        scope.add(scopes.Binding('x', types.Number))
+        assert scope.index('x') == (1, 0)
+        with pytest.raises(scopes.NameNotFound):
+            scope.index('w')
+
+    def test_deep(self):
+        tree = NumberNode('1')
+        for _ in range(5000):
+            tree = ListNode([tree])
+        with pytest.raises(RecursionError):
+            pickle.dumps(tree)
+        # Comparing deep trees would recurse too, so compare their renders
+        assert str(serial.loads(serial.dumps(tree))) == str(tree)
+
+    def test_invalid(self):
+        data = serial.dumps(Parser(SOURCE).program()[-1])
+        with pytest.raises(FormatError):
+            serial.loads(b'not a tree')
+        with pytest.raises(FormatError):
+            serial.loads(data[:-1])
+        with pytest.raises(FormatError):
+            serial.loads(data + b'\0')
+        # Test that data from different node classes is refused
+        data = bytearray(data)
+        data[5] ^= 0xff
+        with pytest.raises(FormatError):
+            serial.loads(data)
+        with pytest.raises(TypeError):
+            serial.dumps(ListNode([object()]))